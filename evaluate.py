@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+"""
+@file    evaluate.py
+
+Compare the traffic light controllers on identical scenarios.
+
+Every controller is run once per route seed, each run in its own worker
+process with its own SUMO instance. The tripinfo and summary outputs are
+parsed incrementally, so memory does not grow with the simulated horizon.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+
+import os
+import sys
+import time
+import shutil
+import optparse
+import tempfile
+import multiprocessing
+from collections import Counter
+from xml.etree import ElementTree
+
+from traci_tls import cli, routes
+from traci_tls.sumo import sumo_command, traci
+from traci_tls.controllers import CONTROLLERS, get_controller
+
+# table column -> (width, conversion), a negative width aligns left
+COLUMNS = [
+    ("controller", -14, "s"),
+    ("runs", 5, "d"),
+    ("throughput_vph", 15, ".1f"),
+    ("mean_delay_s", 13, ".2f"),
+    ("mean_wait_s", 12, ".2f"),
+    ("queue_mean", 11, ".2f"),
+    ("queue_p95", 10, ".1f"),
+    ("queue_max", 10, ".1f"),
+    ("wall_s_per_sim_h", 17, ".2f"),
+]
+
+
+def iter_elements(path, tag):
+    """yield the attributes of every <tag> element of a SUMO output file
+
+    Elements are cleared as soon as they are read, so the whole document is
+    never held in memory.
+    """
+    context = ElementTree.iterparse(path, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event == "end" and elem.tag == tag:
+            yield elem.attrib
+            root.clear()
+
+
+def parse_tripinfo(path, window):
+    """the delays of all trips and the arrivals within the first window seconds"""
+    arrived = 0
+    arrived_in_window = 0
+    time_loss = 0.
+    waiting_time = 0.
+    for attrib in iter_elements(path, "tripinfo"):
+        arrived += 1
+        if float(attrib["arrival"]) <= window:
+            arrived_in_window += 1
+        time_loss += float(attrib["timeLoss"])
+        waiting_time += float(attrib["waitingTime"])
+    return {
+        "arrived": arrived_in_window,
+        "mean_delay_s": time_loss / arrived if arrived else 0.,
+        "mean_wait_s": waiting_time / arrived if arrived else 0.,
+    }
+
+
+def parse_summary(path, window):
+    """the end of the simulation and the queue statistics of the first
+    window seconds"""
+    # the number of halting vehicles is integral and bounded by the number of
+    # vehicles in the network, so a histogram gives exact quantiles in
+    # constant memory
+    halting = Counter()
+    end = 0.
+    for attrib in iter_elements(path, "step"):
+        end = float(attrib["time"])
+        if end < window:
+            halting[int(attrib["halting"])] += 1
+    steps = sum(halting.values())
+    stats = {"sim_end_s": end, "queue_mean": 0., "queue_p95": 0., "queue_max": 0.}
+    if steps:
+        stats["queue_mean"] = sum(k * v for k, v in halting.items()) / steps
+        stats["queue_max"] = max(halting)
+        seen = 0
+        for value in sorted(halting):
+            seen += halting[value]
+            if seen >= 0.95 * steps:
+                stats["queue_p95"] = value
+                break
+    return stats
+
+
+def run_controller(task):
+    """run a single controller on a single scenario inside a worker process"""
+    controller, seed, routefile, workdir, nogui, flows, window = task
+    # the seed also selects the random streams of the agent, so a run gives
+    # the same result in whichever worker it ends up
+    # the prefix also applies to the detector output declared in
+    # cross.det.xml, which would otherwise be shared by all workers
+    prefix = "%s_%s." % (controller, seed)
+    options = cli.get_options(["--controller", controller, "--seed", str(seed), "--noplot",
+                               "--checkpoint-dir", os.path.join(workdir, prefix + "q_table")] +
+                              (["--nogui"] if nogui else []))
+    tripinfo = os.path.join(workdir, "tripinfo.xml")
+    summary = os.path.join(workdir, "summary.xml")
+
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        traci.start(sumo_command(nogui, options.config,
+                                 "--route-files", os.path.abspath(routefile),
+                                 "--tripinfo-output", tripinfo,
+                                 "--summary-output", summary,
+                                 "--output-prefix", prefix,
+                                 "--verbose", "false",
+                                 "--no-warnings", "true",
+                                 *(["--seed", str(routes.sumo_seed(seed))] if flows else [])))
+        start = time.time()
+        get_controller(controller).run(options)
+        wall = time.time() - start
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    detector_output = os.path.join("data", prefix + "cross.out")
+    if os.path.exists(detector_output):
+        os.remove(detector_output)
+
+    result = {"controller": controller, "seed": seed, "wall_s": wall}
+    result.update(parse_tripinfo(os.path.join(workdir, prefix + "tripinfo.xml"), window))
+    result.update(parse_summary(os.path.join(workdir, prefix + "summary.xml"), window))
+    result["window_s"] = window
+    return result
+
+
+def aggregate(results):
+    """average the per-run results of every controller into one table row
+
+    Throughput and queues refer to the demand window shared by all runs,
+    not to the end of each simulation, which depends on the controller.
+    """
+    rows = []
+    by_controller = {}
+    for result in results:
+        by_controller.setdefault(result["controller"], []).append(result)
+    for controller in sorted(by_controller):
+        runs = by_controller[controller]
+        sim_hours = sum(r["sim_end_s"] for r in runs) / 3600.
+        window_hours = sum(r["window_s"] for r in runs) / 3600.
+        row = {
+            "controller": controller,
+            "runs": len(runs),
+            "throughput_vph": sum(r["arrived"] for r in runs) / window_hours if window_hours else 0.,
+            "wall_s_per_sim_h": sum(r["wall_s"] for r in runs) / sim_hours if sim_hours else 0.,
+        }
+        for key in ("mean_delay_s", "mean_wait_s", "queue_mean", "queue_p95", "queue_max"):
+            row[key] = sum(r[key] for r in runs) / len(runs)
+        rows.append(row)
+    return rows
+
+
+def print_table(rows, out=sys.stdout):
+    print(" ".join("%*s" % (width, name) for name, width, _ in COLUMNS), file=out)
+    for row in rows:
+        print(" ".join(("%*" + conversion) % (width, row[name])
+                       for name, width, conversion in COLUMNS), file=out)
+
+
+def write_csv(rows, path):
+    with open(path, "w") as f:
+        print(",".join(name for name, _, _ in COLUMNS), file=f)
+        for row in rows:
+            print(",".join(str(row[name]) for name, _, _ in COLUMNS), file=f)
+
+
+def get_options():
+    optParser = optparse.OptionParser()
+    # the halting controller runs a fixed number of episodes of 1000
+    # decisions whatever the demand, so it is not comparable by default
+    optParser.add_option("--controllers", default=",".join(sorted(set(CONTROLLERS) - {"halting"})),
+                         help="comma separated list of controllers to compare [default: %default]")
+    optParser.add_option("--seeds", default="42,43,44,45",
+                         help="comma separated list of route seeds [default: %default]")
+    optParser.add_option("--demand", default="tutorial",
+                         help="the demand preset shared by all controllers, one of %s [default: %%default]" % ", ".join(sorted(routes.DEMANDS)))
+    optParser.add_option("--steps", type="int", default=3600,
+                         help="number of seconds with departures per scenario [default: %default]")
+    optParser.add_option("--workers", type="int", default=multiprocessing.cpu_count(),
+                         help="number of parallel worker processes [default: %default]")
+    optParser.add_option("--flows", action="store_true", default=False,
+                         help="write the demand as <flow> elements drawn by sumo")
+    optParser.add_option("--csv", help="also write the comparison table to this file")
+    optParser.add_option("--gui", action="store_true", default=False,
+                         help="run the gui version of sumo")
+    options, args = optParser.parse_args()
+    options.controllers = options.controllers.split(",")
+    for controller in options.controllers:
+        if controller not in CONTROLLERS:
+            optParser.error("unknown controller '%s'" % controller)
+    if options.demand not in routes.DEMANDS:
+        optParser.error("unknown demand '%s'" % options.demand)
+    options.seeds = [int(seed) for seed in options.seeds.split(",")]
+    return options
+
+
+# this is the main entry point of this script
+if __name__ == "__main__":
+    options = get_options()
+    workdir = tempfile.mkdtemp(prefix="traci_eval_")
+    try:
+        # every controller sees exactly the same route files
+        tasks = []
+        for seed in options.seeds:
+            routefile = os.path.join(workdir, "cross_%s.rou.xml" % seed)
+            demand = dict(routes.DEMANDS[options.demand], N=options.steps)
+            if options.flows:
+                routes.generate_flowfile(routefile, **demand)
+            else:
+                routes.generate_routefile(routefile, seed, **demand)
+            for controller in options.controllers:
+                tasks.append((controller, seed, routefile, workdir, not options.gui, options.flows, options.steps))
+
+        pool = multiprocessing.Pool(max(1, min(options.workers, len(tasks))))
+        try:
+            results = pool.map(run_controller, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+        rows = aggregate(results)
+        print_table(rows)
+        if options.csv:
+            write_csv(rows, options.csv)
+    finally:
+        shutil.rmtree(workdir)
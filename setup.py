@@ -0,0 +1,13 @@
+from setuptools import setup, find_packages
+
+setup(
+    name="traci_tls",
+    version="0.1",
+    description="Traffic light control experiments with SUMO and TraCI",
+    packages=find_packages(),
+    install_requires=["numpy"],
+    extras_require={"plot": ["matplotlib"]},
+    entry_points={
+        "console_scripts": ["traci-tls = traci_tls.cli:main"],
+    },
+)
@@ -0,0 +1,7 @@
+"""
+Traffic light control experiments for the SUMO "cross" scenario.
+
+The package is kept import-light on purpose: controllers, NumPy and
+matplotlib are only imported once a controller has been selected, see
+traci_tls.controllers.
+"""
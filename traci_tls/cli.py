@@ -0,0 +1,131 @@
+"""
+Command line entry point: generate the routes, start sumo and run the
+selected controller.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import os
+import sys
+import json
+import optparse
+import subprocess
+
+from traci_tls import routes, sumo
+from traci_tls.controllers import CONTROLLERS, get_controller
+
+
+def get_options(args=None):
+    optParser = optparse.OptionParser()
+    optParser.add_option("-c", "--controller", default="fixed",
+                         help="the controller to run, one of %s [default: %%default]" % ", ".join(sorted(CONTROLLERS)))
+    optParser.add_option("--list", action="store_true", default=False,
+                         help="list the available controllers and exit")
+    optParser.add_option("--nogui", action="store_true",
+                         default=False, help="run the commandline version of sumo")
+    optParser.add_option("--noplot", action="store_true", default=False,
+                         help="do not plot the rewards (implied by --nogui)")
+    optParser.add_option("--embedded", action="store_true", default=False,
+                         help="run the controller in the python interpreter embedded in sumo")
+    optParser.add_option("--config", default="data/cross.sumocfg",
+                         help="the sumo configuration [default: %default]")
+    optParser.add_option("--routefile", default="data/cross.rou.xml",
+                         help="where to write the generated routes [default: %default]")
+    optParser.add_option("--seed", type="int", default=42,
+                         help="the seed of the random streams of the routes and the agent [default: %default]")
+    optParser.add_option("--steps", type="int",
+                         help="number of seconds with departures [default: depends on the controller]")
+    optParser.add_option("--tripinfo", default="tripinfo.xml",
+                         help="the tripinfo output [default: %default]")
+    optParser.add_option("--q-table", dest="q_table", default="",
+                         help="Q table (csv) or MLP weights (npz) to start from")
+    optParser.add_option("--decision-threshold", dest="decision_threshold", type="float",
+                         help="only decide again once a jam length changed by this many meters (occupancy controller) [default: decide every step]")
+    optParser.add_option("--agent", default="tabular", choices=["tabular", "mlp"],
+                         help="the Q function of the occupancy controller, tabular or mlp [default: %default]")
+    optParser.add_option("--metrics",
+                         help="append summaries of the training metrics to this csv file")
+    optParser.add_option("--metrics-interval", dest="metrics_interval", type="int", default=3600,
+                         help="simulated seconds between two metrics summaries [default: %default]")
+    optParser.add_option("--checkpoint-dir", dest="checkpoint_dir", default="data/q_table",
+                         help="directory of the Q table checkpoints (occupancy controller) [default: %default]")
+    optParser.add_option("--record",
+                         help="append the observed transitions to the trajectory log in this directory (occupancy controller)")
+    optParser.add_option("--planning", type="int", default=0,
+                         help="Dyna-Q planning updates per simulation step on a background thread (occupancy controller, tabular agent) [default: %default]")
+    optParser.add_option("--pipeline", type="int", metavar="STALENESS",
+                         help="update the agent on a worker thread while sumo steps, deciding on a Q function missing at most STALENESS of the latest updates (occupancy controller) [default: update in the loop]")
+    optParser.add_option("--flows", action="store_true", default=False,
+                         help="write the demand as <flow> elements instead of one <vehicle> per departure")
+    optParser.add_option("--counts",
+                         help="csv file (time,approach,count) of detector counts to calibrate the flows from, implies --flows")
+    optParser.add_option("--slice-length", dest="slice_length", type="int", default=900,
+                         help="seconds per calibrated flow probability [default: %default]")
+    optParser.add_option("--count-interval", dest="count_interval", type="int", default=60,
+                         help="seconds counted by a row of the counts file [default: %default]")
+    optParser.add_option("--stop-tolerance", dest="stop_tolerance", type="float",
+                         help="stop training once the mean Q update decreased by less than this fraction over the last --stop-patience checks and the rewards show no trend (occupancy controller, tabular agent) [default: never]")
+    optParser.add_option("--stop-patience", dest="stop_patience", type="int", default=3,
+                         help="number of checks over which the mean Q update must not decrease [default: %default]")
+    optParser.add_option("--check-interval", dest="check_interval", type="int", default=10000,
+                         help="simulated seconds between two convergence checks [default: %default]")
+    options, args = optParser.parse_args(args)
+    if options.controller not in CONTROLLERS:
+        optParser.error("unknown controller '%s'" % options.controller)
+    if options.planning and options.agent != "tabular":
+        optParser.error("--planning requires the tabular agent")
+    if options.pipeline is not None and options.pipeline < 0:
+        optParser.error("--pipeline must not be negative")
+    if options.stop_tolerance is not None and options.agent != "tabular":
+        optParser.error("--stop-tolerance requires the tabular agent")
+    for option in ("stop_patience", "check_interval", "metrics_interval"):
+        if getattr(options, option) < 1:
+            optParser.error("--%s must be at least 1" % option.replace("_", "-"))
+    options.plot = not (options.nogui or options.noplot)
+    options.flows = options.flows or bool(options.counts)
+    return options
+
+
+def generate_routefile(options, controller):
+    demand = dict(routes.DEMANDS[controller.DEMAND])
+    if options.steps is not None:
+        demand["N"] = options.steps
+    if options.counts:
+        slices = routes.calibrate(options.counts, options.slice_length, interval=options.count_interval)
+        routes.generate_flowfile(options.routefile, slices=slices, slice_length=options.slice_length, **demand)
+    elif options.flows:
+        routes.generate_flowfile(options.routefile, **demand)
+    else:
+        routes.generate_routefile(options.routefile, options.seed, **demand)
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    options = get_options(args)
+    if options.list:
+        for name in sorted(CONTROLLERS):
+            print(name)
+        return 0
+    controller = get_controller(options.controller)
+
+    # first, generate the route file for this simulation
+    generate_routefile(options, controller)
+
+    sumoArgs = ["--route-files", os.path.abspath(options.routefile),
+                "--tripinfo-output", options.tripinfo]
+    if options.flows:
+        # sumo draws the departures of the flows
+        sumoArgs += ["--seed", str(routes.sumo_seed(options.seed))]
+    if options.embedded:
+        # call sumo with the request to run traci_tls.embedded in the internal
+        # interpreter, which gets the command line through the environment
+        from traci_tls import embedded
+        env = dict(os.environ, TRACI_TLS_ARGS=json.dumps(args))
+        script = os.path.splitext(embedded.__file__)[0] + ".py"
+        return subprocess.call(sumo.sumo_command(options.nogui, options.config, "--python-script", script, *sumoArgs),
+                               stdout=sys.stdout, stderr=sys.stderr, env=env)
+
+    sumo.start(options.nogui, options.config, *sumoArgs)
+    controller.run(options)
+    return 0
@@ -0,0 +1,31 @@
+"""
+Registry of the traffic light controllers.
+
+A controller is a module with a ``run(options)`` function executing the
+TraCI control loop and a ``DEMAND`` naming its preset in
+traci_tls.routes.DEMANDS. Modules are only imported when a controller is
+selected, so registering one costs nothing at startup. To add a controller,
+add its module here.
+"""
+from __future__ import absolute_import
+
+import importlib
+
+# controller name -> module
+CONTROLLERS = {
+    "fixed": "traci_tls.controllers.fixed",
+    "actuated": "traci_tls.controllers.actuated",
+    "halting": "traci_tls.controllers.halting",
+    "duration": "traci_tls.controllers.duration",
+    "occupancy": "traci_tls.controllers.occupancy",
+}
+
+
+def get_controller(name):
+    """import and return the module of the controller called name"""
+    try:
+        module = CONTROLLERS[name]
+    except KeyError:
+        raise ValueError("unknown controller '%s', choose from %s" % (
+            name, ", ".join(sorted(CONTROLLERS))))
+    return importlib.import_module(module)
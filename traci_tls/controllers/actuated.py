@@ -0,0 +1,38 @@
+"""
+The actuated rule of the TraCI tutorial: keep green for EW until a vehicle
+shows up in the north.
+"""
+from __future__ import absolute_import
+
+import sys
+
+from traci_tls.sumo import traci
+from traci_tls import topology
+
+DEMAND = "tutorial"
+
+
+def run(options):
+    """execute the actuated control loop of the tutorial
+
+    The tutorial uses an induction loop on the northern approach; this
+    network only has lane area detectors, so the lane area detector of the
+    northern approach is used instead.
+    """
+    north = topology.load(options.config).detectors_by_approach["north"][0]
+    step = 0
+    # we start with phase 2 where EW has green
+    traci.trafficlight.setPhase("0", 2)
+    while traci.simulation.getMinExpectedNumber() > 0:
+        traci.simulationStep()
+        if traci.trafficlight.getPhase("0") == 2:
+            # we are not already switching
+            if traci.lanearea.getLastStepVehicleNumber(north) > 0:
+                # there is a vehicle from the north, switch
+                traci.trafficlight.setPhase("0", 3)
+            else:
+                # otherwise try to keep green for EW
+                traci.trafficlight.setPhase("0", 2)
+        step += 1
+    traci.close()
+    sys.stdout.flush()
@@ -0,0 +1,121 @@
+"""
+Tabular Q-learning on the halting numbers of the four incoming lanes, the
+agent chooses the duration of the next green phase during each yellow phase.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import sys
+
+import numpy as np
+
+from traci_tls.sumo import traci
+from traci_tls import topology
+from traci_tls.q_learning import QLearning
+from traci_tls.plotting import plot_graph
+from traci_tls.metrics import Metric, MetricsWriter
+from traci_tls.vehicles import VehicleCollector
+from traci_tls.streams import random_streams
+
+DEMAND = "duration"
+
+# The program looks like this
+#    <tlLogic id="0" type="static" programID="0" offset="0">
+# the locations of the tls are      NESW
+#        <phase duration="31" state="GrGr"/>
+#        <phase duration="6"  state="yryr"/>
+#        <phase duration="31" state="rGrG"/>
+#        <phase duration="6"  state="ryry"/>
+#    </tlLogic>
+
+
+def run(options):
+    """execute the TraCI control loop"""
+    step = 0
+    
+    # initialize QLearning
+    num_phase = 2
+    max_num_car_stopped = 10
+    num_lane = 4
+    num_wait_time_category = 10
+    num_action = 10
+    q = QLearning(num_phase, max_num_car_stopped, num_lane, num_action, random_streams(options.seed)["agent"])
+
+    # 北、東、南、西の検知器
+    network = topology.load(options.config)
+    detectors = network.approach_detectors()
+
+    # 交差点付近の車両ごとの待ち時間（コンテキストサブスクリプションでまとめて受け取る）
+    # 毎ステップ全車両の値が送られてくるので、統計を書き出すときだけ使う
+    vehicles = VehicleCollector(network, "0") if options.metrics else None
+
+    # 停止車両数（各レーン9台まで）、最長の待ち時間とrewardの統計を定期的にファイルに書き出す
+    halting_numbers = Metric()
+    waiting_times = Metric()
+    metrics_writer = MetricsWriter(options.metrics, {"reward": q.rewards, "halting": halting_numbers,
+                                                     "waiting_time": waiting_times}, options.metrics_interval)
+
+    # we start with phase 2 where EW has green
+    #traci.trafficlight.setPhase("0", 2)
+    while traci.simulation.getMinExpectedNumber() > 0:
+        traci.simulationStep()
+
+        #next_action_idx = 9
+
+        # 現在の信号のフェーズ
+        light_phase = traci.trafficlight.getPhase("0")
+
+        # 現在のフェーズが黄色かつまだ次のアクションを決めていなかったら、次のフェーズの秒数を決める
+        if (light_phase == 1 or light_phase == 3) and not q.is_calculate_next_action:
+
+            q.is_set_duration = False
+
+            # 次に信号が取るフェーズを取得
+            next_light_phase = 0
+            if light_phase == 1:
+                next_light_phase = 2
+
+            # それぞれのレーンで停まっている車の数
+            count_0, count_1, count_2, count_3 = [
+                min(traci.lanearea.getLastStepHaltingNumber(detector), 9) for detector in detectors]
+
+            # 次の信号のフェーズと現在の混雑状況
+            current_state_dict = {
+                'light_phase': next_light_phase,
+                'nums_car_stopped': [count_0, count_1, count_2, count_3]
+            }
+
+            current_digitized_state = q.digitize_state(current_state_dict)
+            q.next_action_idx = q.get_action(current_digitized_state)
+            q.is_calculate_next_action = True
+
+            # reward
+            reward = - np.sum([x**1.5 for x in [count_0, count_1, count_2, count_3]])
+            q.rewards.append(reward)
+            halting_numbers.append(count_0 + count_1 + count_2 + count_3)
+            if vehicles:
+                vehicles.collect()
+                waiting_times.append(np.max(vehicles.waiting_times()[1]))
+
+            # 各青赤フェーズが終了したタイミングで、以前の状況に対してとったアクションに対するリワードを計算するため、このタイミングで、前回のstateとactionに対するリワードを計算する？
+
+            q.update_Qtable(q.previous_digitized_state, q.previous_action, reward, current_digitized_state)
+
+            q.previous_digitized_state = current_digitized_state
+            q.previous_action_idx = q.next_action_idx
+
+        # 現在のフェーズが0か2でかつまだ秒数をセットしていなかったら、秒数をセットする
+        if (light_phase == 0 or light_phase == 2) and not q.is_set_duration:
+            traci.trafficlight.setPhaseDuration("0", q.action[q.next_action_idx])
+            q.is_set_duration = True
+            q.is_calculate_next_action = False
+            print("set phase {} for {} seconds".format(light_phase, q.action[q.next_action_idx]))
+
+        step += 1
+        metrics_writer.tick(step)
+        if step % 10000 == 0 and options.plot:
+            plot_graph(q.rewards.values())
+
+    metrics_writer.close()
+    traci.close()
+    sys.stdout.flush()
@@ -0,0 +1,36 @@
+"""
+The fixed time program of the network, detector readings are only printed.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import sys
+
+from traci_tls.sumo import traci
+from traci_tls import topology
+
+DEMAND = "tutorial"
+
+# The program looks like this
+#    <tlLogic id="0" type="static" programID="0" offset="0">
+# the locations of the tls are      NESW
+#        <phase duration="31" state="GrGr"/>
+#        <phase duration="6"  state="yryr"/>
+#        <phase duration="31" state="rGrG"/>
+#        <phase duration="6"  state="ryry"/>
+#    </tlLogic>
+
+
+def run(options):
+    """execute the TraCI control loop"""
+    detectors = topology.load(options.config).approach_detectors()
+    step = 0
+    while traci.simulation.getMinExpectedNumber() > 0:
+        traci.simulationStep()
+
+        for detector in detectors:
+            print("{}: {}".format(detector, traci.lanearea.getLastStepHaltingNumber(detector)))
+
+        step += 1
+    traci.close()
+    sys.stdout.flush()
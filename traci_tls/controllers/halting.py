@@ -0,0 +1,152 @@
+"""
+Tabular Q-learning on the halting numbers of the four incoming lanes, the
+agent decides every few seconds whether to keep or switch the green phase.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import sys
+
+import numpy as np
+
+from traci_tls.sumo import traci
+from traci_tls import topology
+from traci_tls.scheduling import DecisionScheduler
+from traci_tls.streams import random_streams
+
+DEMAND = "halting"
+
+
+def run(options):
+    """execute the TraCI control loop"""
+    num_episode = 10
+    step_interval = 10
+    num_dizitized = 10
+    action_space = 2
+    rng = random_streams(options.seed)["agent"]
+    q_table = rng.uniform(
+        low=-1, high=1, size=(num_dizitized, num_dizitized, num_dizitized, num_dizitized, action_space))
+
+    scheduler = DecisionScheduler("0")
+    # the incoming lanes from the west, east, south and north
+    network = topology.load(options.config)
+    lane1, lane2, lane3, lane4 = [network.lanes_by_approach[approach][0]
+                                  for approach in ("west", "east", "south", "north")]
+
+    for episode in range(num_episode):
+        step = 0
+        # we start with phase 2 where EW has green
+        traci.trafficlight.setPhase("0", 2)
+        # get the num of halting car of each lane
+        lane1_halting_num = traci.lane.getLastStepHaltingNumber(lane1)
+        lane2_halting_num = traci.lane.getLastStepHaltingNumber(lane2)
+        lane3_halting_num = traci.lane.getLastStepHaltingNumber(lane3)
+        lane4_halting_num = traci.lane.getLastStepHaltingNumber(lane4)
+        total_halting_num = lane1_halting_num + lane2_halting_num + lane3_halting_num + lane4_halting_num
+        if lane1_halting_num > 9:
+            lane1_halting_num = 9
+        if lane2_halting_num > 9:
+            lane2_halting_num = 9
+        if lane3_halting_num > 9:
+            lane3_halting_num = 9
+        if lane4_halting_num > 9:
+            lane4_halting_num = 9
+
+        action = np.argmax(q_table[lane1_halting_num, lane2_halting_num, lane3_halting_num, lane4_halting_num])
+
+        # while traci.simulation.getMinExpectedNumber() > 0:
+        while step < 1000:
+            scheduler.advance()
+
+            if traci.trafficlight.getPhase("0") == 0:
+                if action == 0:
+                    # keep green for NS
+                    traci.trafficlight.setPhase("0", 0)
+                else:
+                    # otherwise try to change green for EW
+                    traci.trafficlight.setPhase("0", 1)
+                    scheduler.until_phase(2)
+                scheduler.advance(scheduler.time + step_interval)
+
+            elif traci.trafficlight.getPhase("0") == 2:
+                if action == 0:
+                    # change green for NS
+                    traci.trafficlight.setPhase("0", 3)
+                    scheduler.until_phase(0)
+                else:
+                    # otherwise try to keep green for EW
+                    traci.trafficlight.setPhase("0", 2)
+                scheduler.advance(scheduler.time + step_interval)
+
+            # get the num of halting car of each lane
+            next_lane1_halting_num = traci.lane.getLastStepHaltingNumber(lane1)
+            next_lane2_halting_num = traci.lane.getLastStepHaltingNumber(lane2)
+            next_lane3_halting_num = traci.lane.getLastStepHaltingNumber(lane3)
+            next_lane4_halting_num = traci.lane.getLastStepHaltingNumber(lane4)
+            next_total_halting_num = next_lane1_halting_num + next_lane2_halting_num + next_lane3_halting_num + next_lane4_halting_num
+            if next_lane1_halting_num > 9:
+                next_lane1_halting_num = 9
+            if next_lane2_halting_num > 9:
+                next_lane2_halting_num = 9
+            if next_lane3_halting_num > 9:
+                next_lane3_halting_num = 9
+            if next_lane4_halting_num > 9:
+                next_lane4_halting_num = 9
+
+            reward = - next_total_halting_num
+            print(reward)
+
+            q_table = update_Qtable(q_table, action, reward, lane1_halting_num, lane2_halting_num, lane3_halting_num, lane4_halting_num,
+                          next_lane1_halting_num, next_lane2_halting_num, next_lane3_halting_num, next_lane4_halting_num)
+            action = get_action(q_table, next_lane1_halting_num, next_lane2_halting_num, next_lane3_halting_num, next_lane4_halting_num,
+                       episode, rng)
+            step += 1
+    traci.close()
+    sys.stdout.flush()
+
+
+# Add for reinforcement learning -------------------------
+# 行動を求める関数
+def get_action(q_table, next_lane1_halting_num, next_lane2_halting_num, next_lane3_halting_num, next_lane4_halting_num, episode, rng):
+    # 徐々に最適行動のみをとる、ε-greedy法
+    epsilon = 0.5 * (1 / (episode + 1))
+    if epsilon <= rng.uniform(0, 1):
+        next_action = np.argmax(q_table[next_lane1_halting_num, next_lane2_halting_num,
+                                        next_lane3_halting_num, next_lane4_halting_num])
+    else:
+        next_action = rng.choice([0, 1])
+    return next_action
+
+
+# Qテーブルを更新する関数
+def update_Qtable(q_table, action, reward,
+                  lane1_halting_num, lane2_halting_num, lane3_halting_num, lane4_halting_num,
+                  next_lane1_halting_num, next_lane2_halting_num, next_lane3_halting_num, next_lane4_halting_num):
+    gamma = 0.99
+    alpha = 0.5
+    next_Max_Q = max(q_table[next_lane1_halting_num, next_lane2_halting_num, next_lane3_halting_num, next_lane4_halting_num, 0],
+                    q_table[next_lane1_halting_num, next_lane2_halting_num, next_lane3_halting_num, next_lane4_halting_num, 1])
+
+    q_table[lane1_halting_num, lane2_halting_num, lane3_halting_num, lane4_halting_num, action] = \
+            (1 - alpha) * q_table[next_lane1_halting_num, next_lane2_halting_num, next_lane3_halting_num, next_lane4_halting_num, action] + \
+            alpha * (reward + gamma * next_Max_Q)
+    return q_table
+
+
+# 各レーンの待ち台数に応じてインデックス値を返す関数
+# def get_state_index(lane1_halting_num, lane2_halting_num, lane3_halting_num, lane4_halting_num, traffic_light_phase):
+#     # 各レーンの待ち台数が10台以上の場合、待ち台数は9とする。（上限が9台）
+#     if lane1_halting_num > 9:
+#         lane1_halting_num = 9
+#     if lane2_halting_num > 9:
+#         lane2_halting_num = 9
+#     if lane3_halting_num > 9:
+#         lane3_halting_num = 9
+#     if lane4_halting_num > 9:
+#         lane4_halting_num = 9
+#
+#     index_num = lane1_halting_num + 10 * lane2_halting_num + 100 * lane3_halting_num + 1000 * lane4_halting_num
+#
+#     return index_num
+
+# ----------------------------------------------------------
@@ -0,0 +1,252 @@
+"""
+Q-learning on the jam occupancy of the approaches and the elapsed green
+time, the agent decides every second whether to switch.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import os
+import sys
+
+from traci_tls.sumo import traci
+from traci_tls import topology
+from traci_tls.scheduling import DecisionScheduler
+from traci_tls.occupancy_agent import AGENT_PARAMETERS, create_agent
+from traci_tls.plotting import plot_graph
+from traci_tls.metrics import Metric, MetricsWriter
+from traci_tls.trajectory import TrajectoryWriter, next_episode
+from traci_tls.dyna import TransitionModel, DynaPlanner
+from traci_tls.pipeline import DeferredUpdates
+from traci_tls.streams import random_streams
+from traci_tls.convergence import ConvergenceMonitor
+
+DEMAND = "occupancy"
+
+# 判断ごとに記録する列（--record）
+TRAJECTORY_COLUMNS = [
+    ("episode", "int32", ()),
+    ("step", "int64", ()),
+    ("light_phase", "int8", ()),
+    ("jam_lengths", "float64", (4,)),
+    ("max_length_prev_t", "float64", ()),
+    ("elapsed_time", "int16", ()),
+    ("reward", "float64", ()),
+    ("action", "int8", ()),
+]
+
+# The program looks like this
+#    <tlLogic id="0" type="static" programID="0" offset="0">
+# the locations of the tls are      NESW
+#        <phase duration="31" state="GrGr"/>
+#        <phase duration="6"  state="yryr"/>
+#        <phase duration="31" state="rGrG"/>
+#        <phase duration="6"  state="ryry"/>
+#    </tlLogic>
+
+
+def run(options):
+    """execute the TraCI control loop"""
+    step = 0
+
+    # Initialize QLearning instance
+    # 乱数はシードから作った独立なストリームを使う（並列実行でも再現できるように）
+    rngs = random_streams(options.seed)
+    q = create_agent(options.agent, options.q_table, rngs["agent"])
+    phases = q.phases
+    max_elapsed_time = q.max_elapsed_time
+
+    # 検知器の長さなどは変わらないので、ネットワークのファイルから一度だけ読み込む
+    network = topology.load(options.config)
+    detectors = network.approach_detectors() # 北、東、南、西の検知器
+    detector_lengths = [network.detectors[detector].length for detector in detectors]
+    ns_detectors = network.detectors_on_axis("ns")
+    ew_detectors = network.detectors_on_axis("ew")
+
+    # 観測した状態・行動・rewardを記録して、シミュレーションなしで学習し直せるようにする
+    recorder = None
+    if options.record:
+        episode = next_episode(options.record)
+        # 検知器の長さは変わらないので、列ではなくattrsに記録する
+        recorder = TrajectoryWriter(options.record, TRAJECTORY_COLUMNS,
+                                    dict(AGENT_PARAMETERS, detector_lengths=detector_lengths))
+
+    # 状態と行動の組ごとの訪問回数とQ tableの更新幅を記録して、収束したら学習を打ち切る
+    monitor = None
+    if options.agent == "tabular":
+        monitor = ConvergenceMonitor(len(q.q_table), len(q.actions), q.state_dimensions(),
+                                     options.stop_tolerance or 0, options.stop_patience)
+
+    # キューの長さとrewardの統計を定期的にファイルに書き出す
+    queue_lengths = Metric()
+    metrics = {"reward": q.rewards, "queue_length": queue_lengths}
+    if monitor:
+        metrics["q_delta"] = monitor.deltas
+    metrics_writer = MetricsWriter(options.metrics, metrics, options.metrics_interval)
+
+    # 判断が必要になるステップまでまとめて進める
+    scheduler = DecisionScheduler("0", detectors, options.decision_threshold)
+
+    # sumoを待っている間に、観測した遷移のモデルを使ってQ tableを更新する（Dyna-Q）
+    planner = None
+    if options.planning:
+        model = TransitionModel(len(q.q_table), len(q.actions))
+        planner = DynaPlanner(q, model, options.planning, rng=rngs["planner"])
+
+    def update(state, action, reward, observation):
+        if monitor:
+            before = q.q_table[state, action]
+            q.update_Qtable(state, action, reward, observation)
+            monitor.record(state, action, before, q.q_table[state, action])
+        else:
+            q.update_Qtable(state, action, reward, observation)
+
+    def learn(state, action, reward, observation):
+        if planner:
+            # プランナーと同時にQ tableやモデルを書き換えないようにする
+            with planner.lock:
+                update(state, action, reward, observation)
+                model.update(state, action, reward, observation)
+        else:
+            update(state, action, reward, observation)
+
+    def checkpoint(step):
+        # ここまでのQ tableと訪問回数を保存
+        if updates:
+            updates.wait(0)
+        os.makedirs(options.checkpoint_dir, exist_ok=True)
+        path = os.path.join(options.checkpoint_dir, "q_table_{}".format(step))
+        q.save(path)
+        if monitor:
+            monitor.save(path)
+
+    # Q tableの更新を別スレッドに回して、sumoのステップと並行して計算する
+    # 行動の判断は、反映されていない更新が options.pipeline 個以下になるまで待ってから行う
+    updates = None
+    if options.pipeline is not None:
+        updates = DeferredUpdates(learn, options.pipeline)
+
+    try:
+        while traci.simulation.getMinExpectedNumber() > 0:
+            prev_step = step
+            if planner:
+                planner.resume()
+            step = scheduler.step()
+            if planner:
+                planner.pause()
+            metrics_writer.tick(step)
+
+            # 50000ステップごとにrewardをプロットする
+            if step // 50000 > prev_step // 50000:
+                if options.plot:
+                    plot_graph(q.rewards.values())
+                checkpoint(step)
+
+            # 更新幅とrewardの傾向が横ばいになったら、最後のQ tableを保存して終了する
+            if options.stop_tolerance is not None and step // options.check_interval > prev_step // options.check_interval:
+                if updates:
+                    updates.wait(0)
+                if monitor.check(q.rewards):
+                    print("converged at step {}".format(step))
+                    checkpoint(step)
+                    break
+
+            # 現在の信号のフェーズ
+            light_phase = traci.trafficlight.getPhase("0")
+
+            # もし黄色信号のフェーズだったら次のステップに進む
+            if light_phase == 1 or light_phase == 3:
+                # 直前の青信号の情報を記憶する
+                if q.is_set_max_duration:
+                    q.prev_t = step + 7 # 黄色信号の点灯時間分+1ステップを足しておく
+                    q.is_set_max_duration = False
+                    ns_length = sum(traci.lanearea.getJamLengthMeters(detector) for detector in ns_detectors)
+                    ew_length = sum(traci.lanearea.getJamLengthMeters(detector) for detector in ew_detectors)
+                    q.max_length_prev_t = ns_length + ew_length
+
+                    # 信号が1サイクル回ったら、そのサイクルのリワードの合計を記憶
+                    if light_phase == 3:
+                        q.rewards.append(q.cycle_rewards)
+                        q.cycle_rewards = 0
+                # DEBUG
+                print("Step:", step)
+                print("Yellow light phase")
+                print()
+                # 黄色信号の間は判断しないので、次の青フェーズの最初のステップまで進む
+                scheduler.hold_phase()
+                continue
+
+            # もし青フェーズになったばかりだったら、点灯時間の最大値をセットする
+            # ミリ秒単位でセットするので、40 * 1000
+            if not q.is_set_max_duration:
+                traci.trafficlight.setPhaseDuration("0", q.max_elapsed_time*1000)
+                q.is_set_max_duration = True
+
+            # もし青フェーズの最低点灯時間に達していなかったら、そのまま次のステップに進む
+            if (step - q.prev_t) < q.min_elapsed_time:
+                scheduler.hold_until(q.prev_t + q.min_elapsed_time)
+                continue
+
+            # observation（現在のstate）
+            # 各レーンの混雑状況を取得
+            jam_lengths = [traci.lanearea.getJamLengthMeters(detector) for detector in detectors]
+            occupancies = [jam_length/length for jam_length, length in zip(jam_lengths, detector_lengths)]
+            elapsed_time = min(step - q.prev_t, max_elapsed_time-1)
+            observation = q.observe(light_phase, occupancies, elapsed_time)
+
+            # reward
+            # 各レーンのキューの長さをもとに計算
+            ns_length = jam_lengths[0] + jam_lengths[2]
+            ew_length = jam_lengths[1] + jam_lengths[3]
+            reward = q.calculate_reward(ns_length, ew_length)
+            q.cycle_rewards += reward
+            queue_lengths.append(ns_length + ew_length)
+
+            # DEBUG
+            print("Step:", step)
+            print("Current Phase:", light_phase)
+            print("Elapsed Time:", elapsed_time)
+            print("reward:", reward)
+            print()
+
+            # 前ステップのstateとactionによって得られたrewardとobservationによってQ tableを更新する
+            if updates:
+                updates.submit(q.state, q.action, reward, observation)
+                updates.wait()
+            else:
+                learn(q.state, q.action, reward, observation)
+
+            # 1秒後のアクションを判断する
+            action = q.get_action(observation)
+
+            # 現状のアクションと状態を保存
+            q.action = action
+            q.state = observation
+
+            if recorder:
+                recorder.append(episode=episode, step=step, light_phase=light_phase, jam_lengths=jam_lengths,
+                                max_length_prev_t=q.max_length_prev_t,
+                                elapsed_time=elapsed_time, reward=reward, action=action)
+
+            # もし次にとるべきフェーズが次のフェーズと異なるなら、次のフェーズに移る黄色信号フェーズにセットする
+            if phases[action] != light_phase:
+                traci.trafficlight.setPhase("0", light_phase+1)
+            else:
+                # 同じフェーズを続けるなら、検知器の値が変化するまで進む（閾値が指定されている場合のみ）
+                scheduler.hold_until_change(q.prev_t + max_elapsed_time - 1)
+
+        print("{} simulation steps for {} seconds".format(scheduler.num_steps, step))
+    finally:
+        # 例外やCtrl-Cで止まっても、スレッドを止めてswitch intervalを戻し、バッファに残っている記録を書き出す
+        if planner:
+            planner.stop()
+        if recorder:
+            recorder.close()
+        if updates:
+            updates.close()
+    if monitor:
+        print(monitor.report())
+    if planner:
+        print("{} planning updates".format(planner.num_updates))
+    metrics_writer.close()
+    traci.close()
+    sys.stdout.flush()
@@ -0,0 +1,123 @@
+"""
+Convergence monitoring of a tabular agent.
+
+The ConvergenceMonitor counts the visits of every (state, action) and
+keeps streaming statistics of the size of the Q updates. Its stopping rule
+says when training has plateaued: the mean update size between two checks
+no longer decreases significantly over the last few checks and the recent
+rewards show no trend. The visit counts also tell which regions of the
+state space the agent never saw.
+"""
+from __future__ import absolute_import
+from __future__ import division
+
+import math
+
+import numpy as np
+
+from traci_tls.metrics import Metric
+
+
+class ConvergenceMonitor(object):
+    """visit counts and update sizes of a Q table
+
+    dimensions is a list of (name, size) of the digitized state in C order,
+    i.e. the state index is np.ravel_multi_index over the sizes.
+    """
+
+    def __init__(self, num_states, num_actions, dimensions, tolerance=1e-3, patience=3,
+                 window=100, z=2.):
+        self.visits = np.zeros((num_states, num_actions), dtype=np.uint32)
+        self.dimensions = dimensions
+        self.tolerance = tolerance
+        self.patience = patience
+        self.window = window
+        self.z = z
+        # |Q(s, a) after - before| and |Q(s, a)| of every update
+        self.deltas = Metric()
+        self.values = Metric()
+        # count, sum and sum of squares of |dQ| since the last check, and the
+        # (count, mean, variance) of the intervals between the past checks
+        self.interval = [0, 0., 0.]
+        self.intervals = []
+
+    def record(self, state, action, before, after):
+        self.visits[state, action] += 1
+        delta = abs(after - before)
+        self.deltas.append(delta)
+        self.values.append(abs(after))
+        self.interval[0] += 1
+        self.interval[1] += delta
+        self.interval[2] += delta * delta
+
+    def relative_delta(self):
+        """the recent update size relative to the recent Q values"""
+        if not self.deltas.count:
+            return float("inf")
+        return self.deltas.ema / max(self.values.ema, 1e-12)
+
+    def reward_trend(self, rewards):
+        """the difference of the means of the newer and the older half of the
+        last window rewards in standard errors, nan if there are too few"""
+        values = rewards.values()[-self.window:]
+        if len(values) < self.window:
+            return float("nan")
+        older, newer = values[:len(values) // 2], values[len(values) // 2:]
+        error = math.sqrt(np.var(older) / len(older) + np.var(newer) / len(newer))
+        return (np.mean(newer) - np.mean(older)) / max(error, 1e-12)
+
+    def close_interval(self):
+        """store the statistics of the updates since the last check"""
+        count, total, squares = self.interval
+        mean = total / count if count else float("nan")
+        variance = (squares - count * mean * mean) / (count - 1) if count > 1 else float("nan")
+        self.intervals.append((count, mean, max(variance, 0.)))
+        self.interval = [0, 0., 0.]
+
+    def delta_decrease(self):
+        """the decrease of the mean update size from the interval patience
+        checks ago to the last one, relative to the older mean and in
+        standard errors, nan if there are too few intervals"""
+        if len(self.intervals) <= self.patience:
+            return float("nan"), float("nan")
+        (n0, mean0, var0), (n1, mean1, var1) = self.intervals[-1 - self.patience], self.intervals[-1]
+        if n0 < 2 or n1 < 2:
+            return float("nan"), float("nan")
+        error = math.sqrt(var0 / n0 + var1 / n1)
+        return (mean0 - mean1) / max(mean0, 1e-12), (mean0 - mean1) / max(error, 1e-12)
+
+    def check(self, rewards):
+        """True once the mean update size did not decrease significantly
+        over the last patience checks and the rewards show no trend
+
+        A decrease is significant if it is both more than tolerance of the
+        older mean and more than z standard errors.
+        """
+        self.close_interval()
+        relative, z = self.delta_decrease()
+        if math.isnan(relative):
+            return False
+        plateau = relative < self.tolerance or z < self.z
+        return plateau and abs(self.reward_trend(rewards)) < self.z
+
+    def coverage(self):
+        """the fraction of visited states and, per dimension of the state,
+        the values whose states were never visited"""
+        visited = (self.visits.sum(axis=1) > 0).reshape([size for _, size in self.dimensions])
+        never = []
+        for axis, (name, size) in enumerate(self.dimensions):
+            other = tuple(a for a in range(len(self.dimensions)) if a != axis)
+            never.append((name, np.flatnonzero(~visited.any(axis=other)).tolist()))
+        return visited.mean(), never
+
+    def report(self):
+        fraction, never = self.coverage()
+        lines = ["visited {:.1%} of the states and {:.1%} of the state-action pairs, relative Q update {:.2e}".format(
+            fraction, np.mean(self.visits > 0), self.relative_delta())]
+        for name, values in never:
+            if values:
+                lines.append("  {} never visited: {}".format(name, values))
+        return "\n".join(lines)
+
+    def save(self, path):
+        np.save(path + ".visits.npy", self.visits)
@@ -0,0 +1,136 @@
+"""
+Dyna-Q planning for the tabular agents.
+
+A TransitionModel counts the observed outcomes of every (state, action):
+the sum of the rewards and the most frequent next states. While the main
+loop waits for sumo, a DynaPlanner replays transitions sampled from the
+model through the agent's own update_Qtable on a background thread.
+"""
+from __future__ import absolute_import
+from __future__ import division
+
+import time
+import threading
+
+import numpy as np
+
+
+class TransitionModel(object):
+    """reward sums and next state counts of the observed (state, action) pairs
+
+    Only the num_successors most frequent next states of a pair are kept, a
+    new next state replaces the least frequent one once all slots are used.
+    """
+
+    def __init__(self, num_states, num_actions, num_successors=8):
+        self.num_actions = num_actions
+        self.visits = np.zeros((num_states, num_actions), dtype=np.int32)
+        self.reward_sums = np.zeros((num_states, num_actions))
+        self.next_states = np.full((num_states, num_actions, num_successors), -1, dtype=np.int32)
+        self.next_counts = np.zeros((num_states, num_actions, num_successors), dtype=np.int32)
+        # the flat indices state * num_actions + action of the visited pairs
+        self.observed = np.zeros(num_states * num_actions, dtype=np.int32)
+        self.num_observed = 0
+
+    def update(self, state, action, reward, next_state):
+        if self.visits[state, action] == 0:
+            self.observed[self.num_observed] = state * self.num_actions + action
+            self.num_observed += 1
+        self.visits[state, action] += 1
+        self.reward_sums[state, action] += reward
+        slots = self.next_states[state, action]
+        counts = self.next_counts[state, action]
+        hit = np.flatnonzero(slots == next_state)
+        if len(hit):
+            slot = hit[0]
+        else:
+            slot = np.argmin(counts)
+            slots[slot] = next_state
+            counts[slot] = 0
+        counts[slot] += 1
+
+    def sample(self, rng, size):
+        """return arrays (states, actions, rewards, next_states) of size
+        transitions drawn from the visited pairs"""
+        flat = self.observed[rng.integers(self.num_observed, size=size)]
+        states, actions = np.divmod(flat, self.num_actions)
+        cumulative = np.cumsum(self.next_counts[states, actions], axis=1)
+        u = rng.uniform(0, cumulative[:, -1])
+        slots = np.sum(cumulative <= u[:, None], axis=1)
+        rewards = self.reward_sums[states, actions] / self.visits[states, actions]
+        return states, actions, rewards, self.next_states[states, actions, slots]
+
+
+class DynaPlanner(object):
+    """run up to budget planning updates of q between resume() and pause()
+
+    The controller calls resume() right before advancing sumo and pause()
+    right after, so the Q table is written by the planner only while the
+    main loop waits for the simulation. The updates run in batches of
+    batch_size under the lock, but a batch is left as soon as pause() is
+    called, so pause() returns once the single update in progress is done.
+    The planner draws from its own Generator (the "planner" stream of
+    traci_tls.streams) and does not change the exploration of the agent.
+
+    The planner and the main loop share the GIL. Once sumo answered, the
+    main loop gets the GIL back at the planner's next sleep(0) between
+    batches or after the interpreter's switch interval, whichever comes
+    first, so every step may be delayed by up to that long: planning trades
+    some wall time per step for more learning per wall time.
+    """
+
+    def __init__(self, q, model, budget, batch_size=8, rng=None):
+        self.q = q
+        self.model = model
+        self.budget = budget
+        self.batch_size = batch_size
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.lock = threading.Lock()
+        self.resumed = threading.Event()
+        self.remaining = 0
+        self.pausing = False
+        self.stopped = False
+        self.num_updates = 0
+        self.thread = threading.Thread(target=self.plan)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def resume(self):
+        with self.lock:
+            self.remaining = self.budget
+            self.resumed.set()
+
+    def pause(self):
+        # set without the lock, the planner checks it between two updates
+        self.pausing = True
+        with self.lock:
+            self.remaining = 0
+            self.resumed.clear()
+            self.pausing = False
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+            self.resumed.set()
+        self.thread.join()
+
+    def plan(self):
+        while True:
+            self.resumed.wait()
+            with self.lock:
+                if self.stopped:
+                    return
+                if self.remaining <= 0 or not self.model.num_observed:
+                    self.resumed.clear()
+                    continue
+                size = min(self.batch_size, self.remaining)
+                for state, action, reward, next_state in zip(*self.model.sample(self.rng, size)):
+                    # pause() waits for the lock, leave the rest of the batch
+                    if self.pausing:
+                        break
+                    self.q.update_Qtable(state, action, reward, next_state)
+                    self.remaining -= 1
+                    self.num_updates += 1
+            # let the main loop take over as soon as sumo answered instead
+            # of after the interpreter's switch interval
+            time.sleep(0)
@@ -0,0 +1,23 @@
+"""
+Script run by the python interpreter embedded in sumo, see --embedded.
+"""
+from __future__ import absolute_import
+
+import os
+import sys
+import json
+
+# the embedded python does not add the current dir to the python path, so
+# we need to do it
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from traci_tls.sumo import traci  # noqa
+from traci_tls.cli import get_options  # noqa
+from traci_tls.controllers import get_controller  # noqa
+
+
+if traci.isEmbedded():
+    # this script has been called from the sumo-internal python interpreter
+    # only execute the main control procedure
+    options = get_options(json.loads(os.environ.get("TRACI_TLS_ARGS", "[]")))
+    get_controller(options.controller).run(options)
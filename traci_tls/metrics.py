@@ -0,0 +1,183 @@
+"""
+Constant memory training metrics.
+
+A Metric keeps the most recent values in a ring buffer and streaming
+aggregates of all values (count, mean, variance, EMA and P-square quantile
+estimates), so its size does not depend on the length of the run. A
+MetricsWriter periodically appends the summaries to a csv file.
+"""
+from __future__ import absolute_import
+from __future__ import division
+
+import math
+
+import numpy as np
+
+
+class RingBuffer(object):
+    """the last capacity values appended"""
+
+    def __init__(self, capacity):
+        self.data = np.zeros(capacity)
+        self.pos = 0
+        self.full = False
+
+    def append(self, x):
+        self.data[self.pos] = x
+        self.pos += 1
+        if self.pos == len(self.data):
+            self.pos = 0
+            self.full = True
+
+    def values(self):
+        """the stored values, oldest first"""
+        if not self.full:
+            return self.data[:self.pos].copy()
+        return np.concatenate((self.data[self.pos:], self.data[:self.pos]))
+
+    def __len__(self):
+        return len(self.data) if self.full else self.pos
+
+
+class P2Quantile(object):
+    """streaming estimate of the p-quantile with the P-square algorithm of
+    Jain and Chlamtac (1985), five markers and no stored samples"""
+
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def append(self, x):
+        q = self.heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+        n = self.positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        # adjust the heights of the inner markers
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        if not self.heights:
+            return float("nan")
+        if len(self.heights) < 5:
+            return self.heights[int(round(self.p * (len(self.heights) - 1)))]
+        return self.heights[2]
+
+
+class Metric(object):
+    """a series of values with constant memory summaries"""
+
+    def __init__(self, capacity=1000, alpha=0.01, quantiles=(0.5, 0.95)):
+        self.recent = RingBuffer(capacity)
+        self.alpha = alpha
+        self.quantiles = [P2Quantile(p) for p in quantiles]
+        self.count = 0
+        self.mean = 0.
+        self._m2 = 0.
+        self.ema = float("nan")
+        self.last = float("nan")
+
+    def append(self, x):
+        x = float(x)
+        self.recent.append(x)
+        # Welford's running mean and variance
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        self.ema = x if self.count == 1 else self.ema + self.alpha * (x - self.ema)
+        self.last = x
+        for quantile in self.quantiles:
+            quantile.append(x)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.
+
+    def values(self):
+        """the most recent values, oldest first"""
+        return self.recent.values()
+
+    def summary(self):
+        result = {
+            "count": self.count,
+            "mean": self.mean,
+            "std": math.sqrt(self.variance),
+            "ema": self.ema,
+            "last": self.last,
+        }
+        for quantile in self.quantiles:
+            result["p%g" % (100 * quantile.p)] = quantile.value()
+        return result
+
+    def __len__(self):
+        return self.count
+
+
+class MetricsWriter(object):
+    """append the summaries of some named metrics to a csv file every
+    interval simulated seconds"""
+
+    def __init__(self, path, metrics, interval=3600):
+        self.path = path
+        self.metrics = metrics
+        self.interval = interval
+        self.last_step = 0
+        self.last_flush = None
+        self.columns = None
+
+    def tick(self, step):
+        if self.path and step // self.interval > self.last_step // self.interval:
+            self.flush(step)
+        self.last_step = step
+
+    def close(self):
+        """write the final summaries at the end of the run"""
+        if self.path and self.last_flush != self.last_step:
+            self.flush(self.last_step)
+
+    def flush(self, step):
+        self.last_flush = step
+        rows = []
+        for name in sorted(self.metrics):
+            summary = self.metrics[name].summary()
+            if self.columns is None:
+                self.columns = sorted(summary)
+            rows.append([str(step), name] + [str(summary[column]) for column in self.columns])
+        with open(self.path, "a") as f:
+            if f.tell() == 0:
+                f.write(",".join(["step", "metric"] + self.columns) + "\n")
+            for row in rows:
+                f.write(",".join(row) + "\n")
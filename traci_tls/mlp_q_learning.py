@@ -0,0 +1,166 @@
+import numpy as np
+
+from traci_tls.metrics import Metric
+
+
+class MLPQLearning:
+    """Q-learning with a small multilayer perceptron instead of a Q table
+
+    The observation is not discretized: the network gets the phase (one-hot),
+    the jam occupancy of every detector and the elapsed green time. It is
+    trained on minibatches from a fixed size replay buffer against a target
+    network, so memory does not depend on the resolution of the state.
+    The controller facing interface is the one of q_learning_2.QLearning.
+    """
+
+    def __init__(self, phases, num_detectors, min_elapsed_time, max_elapsed_time, actions, model=None,
+                 hidden_sizes=(32, 32), batch_size=32, buffer_size=10000, target_update=500,
+                 learning_rate=1e-3, reward_scale=1e-4, rng=None):
+
+        # 初期化、探索とミニバッチの乱数（traci_tls.streams で作ったGenerator）
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.phases = phases
+        self.num_detectors = num_detectors
+        self.min_elapsed_time = min_elapsed_time
+        self.max_elapsed_time = max_elapsed_time
+        self.actions = actions
+        self.num_features = len(phases) + num_detectors + 1
+
+        self.batch_size = batch_size
+        self.target_update = target_update
+        self.learning_rate = learning_rate
+        # rewardは渋滞長の二乗の差なので、学習が発散しないようにスケールを合わせる
+        self.reward_scale = reward_scale
+
+        if model:
+            with np.load(model) as weights:
+                self.params = [weights["arr_{}".format(i)] for i in range(len(weights.files))]
+            print('load MLP model.')
+        else:
+            sizes = [self.num_features] + list(hidden_sizes) + [len(actions)]
+            self.params = []
+            for n_in, n_out in zip(sizes[:-1], sizes[1:]):
+                # He initialization for the ReLU layers
+                self.params.append(self.rng.normal(0, np.sqrt(2. / n_in), size=(n_in, n_out)))
+                self.params.append(np.zeros(n_out))
+        self.target_params = [p.copy() for p in self.params]
+
+        # Adam
+        self.adam_m = [np.zeros_like(p) for p in self.params]
+        self.adam_v = [np.zeros_like(p) for p in self.params]
+        self.num_updates = 0
+
+        # replay buffer (ring buffer of a fixed size)
+        self.buffer_states = np.zeros((buffer_size, self.num_features))
+        self.buffer_actions = np.zeros(buffer_size, dtype=int)
+        self.buffer_rewards = np.zeros(buffer_size)
+        self.buffer_next_states = np.zeros((buffer_size, self.num_features))
+        self.buffer_pos = 0
+        self.buffer_len = 0
+
+        self.is_set_max_duration = False
+        self.prev_t = 0
+        self.action = 0
+        self.state = None
+        self.max_length_prev_t = 0
+        self.rewards = Metric()
+        self.cycle_rewards = 0
+
+    def observe(self, light_phase, occupancies, elapsed_time):
+        features = np.zeros(self.num_features)
+        features[self.phases.index(light_phase)] = 1
+        features[len(self.phases):-1] = np.clip(occupancies, 0, 1)
+        features[-1] = (elapsed_time - self.min_elapsed_time) / float(self.max_elapsed_time - self.min_elapsed_time)
+        return features
+
+    def q_values(self, states, params=None):
+        return forward(self.params if params is None else params, states)[-1]
+
+    def get_action(self, observation):
+        # ε-greedy, 20000stepごとにεを減らす
+        decrease_param = 1 / (np.ceil(self.prev_t / 200) + 1)
+        epsilon = 0.5 * decrease_param
+
+        if epsilon <= self.rng.uniform(0, 1):
+            next_action = np.argmax(self.q_values(observation[np.newaxis])[0])
+        else:
+            next_action = self.rng.choice(self.actions)
+        return next_action
+
+    def calculate_reward(self, ns_length, ew_lenght):
+        # 前回のフェーズの混雑状況と比較してどれくらい改善したかをrewardにする
+        max_length_t = ns_length + ew_lenght
+        reward = self.max_length_prev_t**2 - max_length_t**2
+        return reward
+
+    def update_Qtable(self, state, action, reward, observation):
+        # 最初の判断の前にはまだ遷移がない
+        if state is None:
+            return
+        pos = self.buffer_pos
+        self.buffer_states[pos] = state
+        self.buffer_actions[pos] = action
+        self.buffer_rewards[pos] = reward * self.reward_scale
+        self.buffer_next_states[pos] = observation
+        self.buffer_pos = (pos + 1) % len(self.buffer_actions)
+        self.buffer_len = min(self.buffer_len + 1, len(self.buffer_actions))
+
+        if self.buffer_len >= self.batch_size:
+            self.train_batch()
+
+    def train_batch(self):
+        gamma = 0.5
+
+        idx = self.rng.integers(0, self.buffer_len, self.batch_size)
+        states = self.buffer_states[idx]
+        actions = self.buffer_actions[idx]
+        rows = np.arange(self.batch_size)
+
+        targets = self.buffer_rewards[idx] + gamma * np.max(self.q_values(self.buffer_next_states[idx], self.target_params), axis=1)
+        activations = forward(self.params, states)
+        # Huber loss: the gradient of the TD error is clipped to [-1, 1]
+        delta = np.zeros_like(activations[-1])
+        delta[rows, actions] = np.clip(activations[-1][rows, actions] - targets, -1, 1) / self.batch_size
+        self.adam_step(backward(self.params, activations, delta))
+
+        self.num_updates += 1
+        if self.num_updates % self.target_update == 0:
+            self.target_params = [p.copy() for p in self.params]
+
+    def adam_step(self, grads, beta1=0.9, beta2=0.999, eps=1e-8):
+        t = self.num_updates + 1
+        params = []
+        for p, g, m, v in zip(self.params, grads, self.adam_m, self.adam_v):
+            m *= beta1
+            m += (1 - beta1) * g
+            v *= beta2
+            v += (1 - beta2) * g**2
+            params.append(p - self.learning_rate * (m / (1 - beta1**t)) / (np.sqrt(v / (1 - beta2**t)) + eps))
+        # 新しいリストに差し替えるので、別スレッドのget_actionは常に一貫した重みを使う
+        self.params = params
+
+    def save(self, path):
+        np.savez(path + ".npz", *self.params)
+
+
+def forward(params, x):
+    """return the activations of all layers, the last one are the Q values"""
+    activations = [x]
+    for i in range(0, len(params), 2):
+        x = x.dot(params[i]) + params[i + 1]
+        if i + 2 < len(params):
+            x = np.maximum(x, 0)
+        activations.append(x)
+    return activations
+
+
+def backward(params, activations, delta):
+    """return the gradients of params given the gradient delta of the output"""
+    grads = [None] * len(params)
+    for i in reversed(range(0, len(params), 2)):
+        layer_input = activations[i // 2]
+        grads[i] = layer_input.T.dot(delta)
+        grads[i + 1] = delta.sum(axis=0)
+        if i > 0:
+            delta = delta.dot(params[i].T) * (layer_input > 0)
+    return grads
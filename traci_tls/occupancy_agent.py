@@ -0,0 +1,35 @@
+"""
+The agent of the occupancy controller.
+
+Kept apart from the controller so that the agent can be built without
+sumo, e.g. by the decision server.
+"""
+from __future__ import absolute_import
+
+from traci_tls.q_learning_2 import QLearning
+
+# QLearningのパラメータ
+AGENT_PARAMETERS = {
+    "phases": [0, 2],                # 信号のフェーズのうち、0と2のどちらかをとる
+    "num_lane_occupancy_states": 10, # 各レーンの混雑具合のレベル数
+    "num_lanes": 2,                  # レーンの数（南北で一つ、東西で一つ）
+    "min_elapsed_time": 5,           # 信号の最小点灯時間
+    "max_elapsed_time": 40,          # 信号の最大点灯時間
+    "actions": [0, 1],               # 取りうるアクションのインデックス
+}
+
+
+def create_agent(agent="tabular", q_table_model=None, rng=None):
+    """the agent of this controller, tabular or mlp
+
+    q_table_model is the csv file of a saved Q table (or the npz file of
+    saved MLP weights), start from scratch if it is "" or None. rng is the
+    Generator of the agent's random draws.
+    """
+    p = AGENT_PARAMETERS
+    if agent == "mlp":
+        # 離散化せずに検知器（北、東、南、西）ごとの占有率をそのまま使う
+        from traci_tls.mlp_q_learning import MLPQLearning
+        return MLPQLearning(p["phases"], 4, p["min_elapsed_time"], p["max_elapsed_time"], p["actions"], q_table_model, rng=rng)
+    return QLearning(p["phases"], p["num_lane_occupancy_states"], p["num_lanes"],
+                     p["min_elapsed_time"], p["max_elapsed_time"], p["actions"], q_table_model, rng)
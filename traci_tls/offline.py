@@ -0,0 +1,116 @@
+"""
+Rebuild the Q table of q_learning_2.QLearning from a trajectory log
+recorded by the occupancy controller (--record) without running sumo.
+
+The table is fitted by vectorized batch Q-iteration: every sweep sets each
+visited Q(s, a) to the mean of r + gamma * max Q(s', .) over all recorded
+transitions from (s, a).
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import os
+import sys
+import optparse
+
+import numpy as np
+
+from traci_tls.q_learning_2 import QLearning
+from traci_tls.trajectory import load_trajectory
+from traci_tls.streams import random_streams
+
+
+def recorded_reward(log):
+    return np.asarray(log["reward"])
+
+
+def squared_length_reward(log):
+    """the reward of QLearning.calculate_reward recomputed from the raw jam lengths"""
+    length = np.asarray(log["jam_lengths"]).sum(axis=1)
+    return np.asarray(log["max_length_prev_t"])**2 - length**2
+
+
+def recorded_occupancies(attrs, log):
+    """the occupancies of the detectors at every decision of a log"""
+    return np.asarray(log["jam_lengths"]) / np.asarray(attrs["detector_lengths"])
+
+
+def transitions(q, attrs, log, reward=recorded_reward):
+    """return the arrays (states, actions, rewards, next_states) of a log
+
+    Row i of the log holds the observation and action of a decision, its
+    reward arrives with the next decision of the same run.
+    """
+    occupancies = recorded_occupancies(attrs, log)
+    ns_occupancy = np.maximum(occupancies[:, 0], occupancies[:, 2])
+    ew_occupancy = np.maximum(occupancies[:, 1], occupancies[:, 3])
+    states = q.digitize_state(np.asarray(log["light_phase"], dtype=int), ns_occupancy, ew_occupancy,
+                              np.asarray(log["elapsed_time"], dtype=int))
+    rewards = reward(log)
+    episode = np.asarray(log["episode"])
+    same_run = episode[1:] == episode[:-1]
+    return (states[:-1][same_run], np.asarray(log["action"], dtype=int)[:-1][same_run],
+            rewards[1:][same_run], states[1:][same_run])
+
+
+def batch_q_iteration(q_table, states, actions, rewards, next_states, gamma=0.5,
+                      max_iterations=100, tolerance=1e-6):
+    """fit q_table in place to the transitions and return the number of sweeps"""
+    num_actions = q_table.shape[1]
+    flat = q_table.reshape(-1)
+    state_actions = states * num_actions + actions
+    counts = np.bincount(state_actions, minlength=flat.size)
+    visited = counts > 0
+    mean_rewards = np.bincount(state_actions, weights=rewards, minlength=flat.size)[visited] / counts[visited]
+    for iteration in range(1, max_iterations + 1):
+        next_max_Q = np.max(q_table[next_states], axis=1)
+        fitted = mean_rewards + gamma * np.bincount(state_actions, weights=next_max_Q, minlength=flat.size)[visited] / counts[visited]
+        delta = np.max(np.abs(flat[visited] - fitted)) if len(fitted) else 0.
+        flat[visited] = fitted
+        if delta < tolerance:
+            break
+    return iteration
+
+
+def get_options(args=None):
+    optParser = optparse.OptionParser(usage="%prog [options] TRAJECTORY_DIR")
+    optParser.add_option("-o", "--output", default="data/q_table/q_table_offline",
+                         help="where to save the fitted Q table (.csv is appended) [default: %default]")
+    optParser.add_option("--q-table", dest="q_table", default="",
+                         help="csv file with a Q table to start from")
+    optParser.add_option("--seed", type="int", default=42,
+                         help="the seed of the initial Q table when starting from scratch [default: %default]")
+    optParser.add_option("--reward", default="recorded", choices=["recorded", "squared_length"],
+                         help="the reward function, recorded or squared_length [default: %default]")
+    optParser.add_option("--gamma", type="float", default=0.5,
+                         help="the discount factor [default: %default]")
+    optParser.add_option("--iterations", type="int", default=100,
+                         help="maximum number of sweeps [default: %default]")
+    optParser.add_option("--tolerance", type="float", default=1e-6,
+                         help="stop once no Q value changes by more than this [default: %default]")
+    options, args = optParser.parse_args(args)
+    if len(args) != 1:
+        optParser.error("a single trajectory directory is required")
+    options.trajectory = args[0]
+    return options
+
+
+def main(args=None):
+    options = get_options(args)
+    attrs, log = load_trajectory(options.trajectory)
+    q = QLearning(attrs["phases"], attrs["num_lane_occupancy_states"], attrs["num_lanes"],
+                  attrs["min_elapsed_time"], attrs["max_elapsed_time"], attrs["actions"], options.q_table,
+                  random_streams(options.seed)["agent"])
+    reward = {"recorded": recorded_reward, "squared_length": squared_length_reward}[options.reward]
+    states, actions, rewards, next_states = transitions(q, attrs, log, reward)
+    sweeps = batch_q_iteration(q.q_table, states, actions, rewards, next_states, options.gamma,
+                               options.iterations, options.tolerance)
+    os.makedirs(os.path.dirname(options.output) or ".", exist_ok=True)
+    q.save(options.output)
+    print("fitted {} of {} Q values from {} transitions in {} sweeps".format(
+        len(np.unique(states * q.q_table.shape[1] + actions)), q.q_table.size, len(states), sweeps))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Pipelined learning: the Q updates run on a worker thread while the main
+loop decides, sets the traffic light and waits for the next simulation
+step.
+
+Only the action decision stays on the critical path. Before deciding, the
+main loop waits until at most max_staleness submitted updates are not yet
+applied, so a decision never sees a Q function missing more than the
+max_staleness most recent updates. With max_staleness 0 the decisions are
+the same as in the serial loop.
+
+The worker and the main loop share the GIL: the updates only overlap with
+the time the main loop spends waiting on the sumo socket. The switch
+interval of the interpreter is shortened while the worker runs, so the
+main loop gets the GIL back soon after sumo answered.
+"""
+from __future__ import absolute_import
+
+import sys
+import queue
+import threading
+
+
+class DeferredUpdates(object):
+    """apply update(*args) for every submit(*args) in order on a worker thread"""
+
+    def __init__(self, update, max_staleness=1, switch_interval=0.0002):
+        assert max_staleness >= 0, "max_staleness must not be negative"
+        self.update = update
+        self.max_staleness = max_staleness
+        self.queue = queue.Queue()
+        self.changed = threading.Condition()
+        self.submitted = 0
+        self.applied = 0
+        self.error = None
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(switch_interval)
+        self.thread = threading.Thread(target=self.work)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, *args):
+        self.submitted += 1
+        self.queue.put(args)
+
+    def wait(self, max_staleness=None):
+        """block until at most max_staleness (default: the bound given at
+        construction) updates are pending"""
+        if max_staleness is None:
+            max_staleness = self.max_staleness
+        with self.changed:
+            while self.submitted - self.applied > max_staleness and self.error is None:
+                self.changed.wait()
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        """apply the pending updates and stop the worker, the switch interval
+        is restored even if an update failed"""
+        try:
+            self.wait(0)
+        finally:
+            self.queue.put(None)
+            self.thread.join()
+            sys.setswitchinterval(self.switch_interval)
+
+    def work(self):
+        while True:
+            args = self.queue.get()
+            if args is None:
+                return
+            try:
+                self.update(*args)
+            except Exception as e:
+                # raised in the main loop by the next wait
+                with self.changed:
+                    self.error = e
+                    self.changed.notify_all()
+                return
+            with self.changed:
+                self.applied += 1
+                self.changed.notify_all()
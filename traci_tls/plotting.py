@@ -0,0 +1,13 @@
+"""
+Plots of the training progress.
+
+matplotlib is imported on first use only, headless runs never load it.
+"""
+
+
+# rewardをプロットする
+def plot_graph(rewards):
+    import matplotlib.pyplot as plt
+    plt.figure()
+    plt.plot(rewards)
+    plt.show()
@@ -1,9 +1,13 @@
 import numpy as np
 
+from traci_tls.metrics import Metric
+
 
 class QLearning:
-    def __init__(self, num_phase, max_num_car_stopped, num_lane, num_action):
-        self.q_table = np.random.uniform(low=-1, high=1, size=(num_phase*max_num_car_stopped**num_lane, num_action))
+    def __init__(self, num_phase, max_num_car_stopped, num_lane, num_action, rng=None):
+        # 初期化と探索の乱数（traci_tls.streams で作ったGenerator）
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.q_table = self.rng.uniform(low=-1, high=1, size=(num_phase*max_num_car_stopped**num_lane, num_action))
         self.episode = 0
         self.epsilon = 0.5 * (1 / (self.episode + 1))
         self.action = [5, 8, 11, 14, 17, 20, 23, 26, 29, 32]
@@ -13,7 +17,7 @@ class QLearning:
         self.previous_digitized_state = None
         self.max_num_car_stopped = max_num_car_stopped
         self.next_action_idx = 0
-        self.rewards = []
+        self.rewards = Metric()
 
     def digitize_state(self, state_dict):
         light_phase = state_dict['light_phase']
@@ -35,10 +39,10 @@ class QLearning:
         decrease_param = 1 / (np.ceil(self.epsilon / 1000) + 1)
         epsilon = 0.5 * decrease_param
 
-        if epsilon <= np.random.uniform(0, 1):
+        if epsilon <= self.rng.uniform(0, 1):
             next_action_idx = np.argmax(self.q_table[next_state])
         else:
-            next_action_idx = np.random.choice(10)
+            next_action_idx = self.rng.integers(10)
         return next_action_idx
 
     def calculate_reward(self):
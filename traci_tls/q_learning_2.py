@@ -1,14 +1,19 @@
 import numpy as np
 
+from traci_tls.metrics import Metric
+
 
 class QLearning:
-    def __init__(self, phases, num_lane_occupancy_states, num_lanes, min_elapsed_time, max_elapsed_time, actions, q_table_model=None):
+    def __init__(self, phases, num_lane_occupancy_states, num_lanes, min_elapsed_time, max_elapsed_time, actions, q_table_model=None, rng=None):
+
+        # 初期化と探索の乱数（traci_tls.streams で作ったGenerator）
+        self.rng = rng if rng is not None else np.random.default_rng()
 
         if q_table_model:
             self.q_table = np.genfromtxt(q_table_model, delimiter=",")
             print('load Q table model.')
         else:
-            self.q_table = np.random.uniform(low=0, high=1, size=(len(phases) * num_lane_occupancy_states**num_lanes * (max_elapsed_time - min_elapsed_time), len(actions)))
+            self.q_table = self.rng.uniform(low=0, high=1, size=(len(phases) * num_lane_occupancy_states**num_lanes * (max_elapsed_time - min_elapsed_time), len(actions)))
 
         self.phases = phases
         self.num_lane_occupancy_states = num_lane_occupancy_states
@@ -22,7 +27,7 @@ class QLearning:
         self.action = 0
         self.state = 0
         self.max_length_prev_t = 0
-        self.rewards = []
+        self.rewards = Metric()
         self.cycle_rewards = 0
 
     def digitize_state(self, light_phase, ns_occupancy, ew_occupancy, elapsed_time):
@@ -31,21 +36,35 @@ class QLearning:
         elapsed_time = elapsed_time - self.min_elapsed_time
 
         # 各stateをもとにユニークなindexに変換
-        digitized = int(light_phase/2)
+        # 配列を渡せばまとめて変換できる（オフライン学習用）
+        digitized = light_phase // 2
         digitized += len(self.phases) * np.digitize(ns_occupancy, bins=bins(0, 0.9, self.num_lane_occupancy_states))
         digitized += len(self.phases) * self.num_lane_occupancy_states * np.digitize(ew_occupancy, bins=bins(0, 0.9, self.num_lane_occupancy_states))
         digitized += len(self.phases) * self.num_lane_occupancy_states**2 * elapsed_time
         return digitized
 
+    def state_dimensions(self):
+        # digitize_stateのindexを構成する各状態の名前と数（上の桁から）
+        return [("elapsed_time", self.max_elapsed_time - self.min_elapsed_time),
+                ("ew_occupancy", self.num_lane_occupancy_states),
+                ("ns_occupancy", self.num_lane_occupancy_states),
+                ("light_phase", len(self.phases))]
+
+    def observe(self, light_phase, occupancies, elapsed_time):
+        # 検知器（0: 北, 1: 東, 2: 南, 3: 西）ごとの占有率から、南北と東西で一番混んでいる方を使う
+        ns_occupancy = max(occupancies[0], occupancies[2])
+        ew_occupancy = max(occupancies[1], occupancies[3])
+        return self.digitize_state(light_phase, ns_occupancy, ew_occupancy, elapsed_time)
+
     def get_action(self, observation):
         # ε-greedy, 20000stepごとにεを減らす
         decrease_param = 1 / (np.ceil(self.prev_t / 200) + 1)
         epsilon = 0.5 * decrease_param
 
-        if epsilon <= np.random.uniform(0, 1):
+        if epsilon <= self.rng.uniform(0, 1):
             next_action = np.argmax(self.q_table[observation])
         else:
-            next_action = np.random.choice(self.actions)
+            next_action = self.rng.choice(self.actions)
         return next_action
 
     def calculate_reward(self, ns_length, ew_lenght):
@@ -62,6 +81,10 @@ class QLearning:
         self.q_table[state, action] = (1 - alpha) * self.q_table[state, action] + alpha * (reward + gamma * next_max_Q)
 
 
+    def save(self, path):
+        np.savetxt(path + ".csv", self.q_table, delimiter=",")
+
+
 def bins(clip_min, clip_max, num):
     return np.linspace(clip_min, clip_max, num + 1)[1:-1]
 
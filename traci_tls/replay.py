@@ -0,0 +1,107 @@
+"""
+Feed the observations of a trajectory log (occupancy controller, --record)
+to a decision server and report the round trip latency and throughput.
+
+Every connection sends its share of the observations with up to --window
+requests in flight.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+
+import sys
+import time
+import optparse
+import threading
+
+from traci_tls.metrics import Metric
+from traci_tls.server import REQUEST, RESPONSE, REJECTED, connect, recv_exactly
+from traci_tls.occupancy_agent import AGENT_PARAMETERS
+from traci_tls.trajectory import load_trajectory
+from traci_tls.offline import recorded_occupancies
+
+
+def observations(attrs, log):
+    """the requests (without id) of the decisions in a log"""
+    occupancies = recorded_occupancies(attrs, log)
+    return [(int(light_phase), int(elapsed_time)) + tuple(occupancy)
+            for light_phase, elapsed_time, occupancy
+            in zip(log["light_phase"], log["elapsed_time"], occupancies)]
+
+
+def replay(address, requests, window=1):
+    """send requests over one connection, return the round trip times and
+    the actions in the order of the requests"""
+    sock = connect(address)
+    sent = {}
+    round_trips = []
+    actions = [None] * len(requests)
+    next_request = 0
+    while len(round_trips) < len(requests):
+        while next_request < len(requests) and len(sent) < window:
+            sent[next_request] = time.time()
+            sock.sendall(REQUEST.pack(next_request, *requests[next_request]))
+            next_request += 1
+        request_id, action = RESPONSE.unpack(recv_exactly(sock, RESPONSE.size))
+        round_trips.append(time.time() - sent.pop(request_id))
+        actions[request_id] = action
+    sock.close()
+    return round_trips, actions
+
+
+def get_options(args=None):
+    optParser = optparse.OptionParser(usage="%prog [options] TRAJECTORY_DIR")
+    optParser.add_option("-a", "--address", default="127.0.0.1:8813",
+                         help="host:port or unix:/path of the decision server [default: %default]")
+    optParser.add_option("--connections", type="int", default=4,
+                         help="number of concurrent connections [default: %default]")
+    optParser.add_option("--window", type="int", default=1,
+                         help="requests in flight per connection [default: %default]")
+    optParser.add_option("--repeat", type="int", default=1,
+                         help="send the observations of the log this many times [default: %default]")
+    options, args = optParser.parse_args(args)
+    if len(args) != 1:
+        optParser.error("a single trajectory directory is required")
+    options.trajectory = args[0]
+    return options
+
+
+def main(args=None):
+    options = get_options(args)
+    attrs, log = load_trajectory(options.trajectory)
+    requests = observations(attrs, log) * options.repeat
+    results = [None] * options.connections
+
+    def worker(i):
+        results[i] = replay(options.address, requests[i::options.connections], options.window)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(options.connections)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    # the action is the index of the next green phase, the light switches
+    # if that is not the current phase
+    phases = AGENT_PARAMETERS["phases"]
+    latency = Metric(quantiles=(0.5, 0.99))
+    switch = rejected = 0
+    for i, (round_trips, actions) in enumerate(results):
+        for round_trip in round_trips:
+            latency.append(round_trip)
+        for request, action in zip(requests[i::options.connections], actions):
+            if action == REJECTED:
+                rejected += 1
+            elif phases[action] != request[0]:
+                switch += 1
+    summary = latency.summary()
+    print("{} decisions ({} switch, {} rejected) in {:.2f} s, {:.0f} decisions/s".format(
+        summary["count"], switch, rejected, elapsed, summary["count"] / elapsed))
+    print("round trip p50 {:.1f} us, p99 {:.1f} us".format(1e6 * summary["p50"], 1e6 * summary["p99"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Generation of the random demand of the cross scenario.
+
+generate_routefile writes one <vehicle> per departure. generate_flowfile
+writes the same demand as a few <flow> elements with a departure
+probability per second, optionally varying over time slices calibrated
+from counts of real detectors (calibrate), and leaves the draws to sumo.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+
+import csv
+import itertools
+
+import numpy as np
+
+from traci_tls.streams import random_streams
+
+# demand per second from different directions, one preset per controller
+# (a probability of None means there is no traffic in that direction)
+DEMANDS = {
+    "tutorial": {"N": 3600, "pWE": 1. / 3, "pEW": 1. / 7, "pNS": 1. / 10, "pSN": 1. / 20},
+    "halting": {"N": 40000, "pWE": 1. / 25, "pEW": 1. / 15, "pNS": 1. / 10, "pSN": None,
+                "nsMaxSpeed": 25},
+    "duration": {"N": 200000, "pWE": 1. / 18, "pEW": 1. / 15, "pNS": 1. / 30, "pSN": 1. / 40},
+    "occupancy": {"N": 1000000, "pWE": 1. / 10, "pEW": 1. / 7, "pNS": 1. / 30, "pSN": 1. / 40},
+}
+
+# route, vehicle type, approach the vehicles come from and extra attributes
+# of the directions pWE, pEW, pNS and pSN
+DIRECTIONS = [
+    ("right", "typeWE", "west", ''),
+    ("left", "typeWE", "east", ''),
+    ("down", "typeNS", "north", ' color="1,0,0"'),
+    ("up", "typeNS", "south", ' color="0,1,0"'),
+]
+
+HEADER = """<routes>
+        <vType id="typeWE" accel="0.8" decel="4.5" sigma="0.5" length="5" minGap="2.5" maxSpeed="16.67" guiShape="passenger"/>
+        <vType id="typeNS" accel="0.8" decel="4.5" sigma="0.5" length="7" minGap="3" maxSpeed="%s" guiShape="bus"/>
+
+        <route id="right" edges="51o 1i 2o 52i" />
+        <route id="left" edges="52o 2i 1o 51i" />
+        <route id="down" edges="54o 4i 3o 53i" />
+        <route id="up" edges="53o 3i 4o 54i" />"""
+
+
+def generate_routefile(routefile="data/cross.rou.xml", seed=42, N=3600,
+                       pWE=1. / 3, pEW=1. / 7, pNS=1. / 10, pSN=1. / 20, nsMaxSpeed=16.67, rng=None):
+    # the "routes" stream of the seed unless a Generator is given, so the
+    # same seed gives the same routes for every controller
+    if rng is None:
+        rng = random_streams(seed)["routes"]
+    # N is the number of time steps
+    with open(routefile, "w") as routes:
+        print(HEADER % nsMaxSpeed, file=routes)
+        vehNr = 0
+        for start in range(0, N, 10000):
+            # draw the departures of a chunk of time steps at once
+            draws = rng.random((min(10000, N - start), 4)).tolist()
+            for i, (uWE, uEW, uNS, uSN) in enumerate(draws, start):
+                if pWE is not None and uWE < pWE:
+                    print('    <vehicle id="right_%i" type="typeWE" route="right" depart="%i" />' % (
+                        vehNr, i), file=routes)
+                    vehNr += 1
+                if pEW is not None and uEW < pEW:
+                    print('    <vehicle id="left_%i" type="typeWE" route="left" depart="%i" />' % (
+                        vehNr, i), file=routes)
+                    vehNr += 1
+                if pNS is not None and uNS < pNS:
+                    print('    <vehicle id="down_%i" type="typeNS" route="down" depart="%i" color="1,0,0"/>' % (
+                        vehNr, i), file=routes)
+                    vehNr += 1
+                if pSN is not None and uSN < pSN:
+                    print('    <vehicle id="up_%i" type="typeNS" route="up" depart="%i" color="0,1,0"/>' % (
+                        vehNr, i), file=routes)
+                    vehNr += 1
+        print("</routes>", file=routes)
+
+
+def generate_flowfile(routefile="data/cross.rou.xml", N=3600,
+                      pWE=1. / 3, pEW=1. / 7, pNS=1. / 10, pSN=1. / 20, nsMaxSpeed=16.67,
+                      slices=None, slice_length=900):
+    """write the demand as <flow> elements with departure probabilities per second
+
+    Without slices the probabilities pWE, pEW, pNS and pSN hold for all N
+    seconds, i.e. the same demand as generate_routefile. slices is an
+    array of the probabilities of the four directions per time slice of
+    slice_length seconds (see calibrate), repeated until N. Consecutive
+    slices with the same probability share one flow.
+    """
+    if slices is None:
+        slices = [[0 if p is None else p for p in (pWE, pEW, pNS, pSN)]]
+        slice_length = N
+    slices = np.minimum(np.asarray(slices, dtype=float), 1)
+    flows = []
+    for direction in range(len(DIRECTIONS)):
+        begin = 0
+        while begin < N:
+            probability = slices[(begin // slice_length) % len(slices), direction]
+            end = min(begin + slice_length, N)
+            while end < N and slices[(end // slice_length) % len(slices), direction] == probability:
+                end = min(end + slice_length, N)
+            if probability > 0:
+                flows.append((begin, direction, end, probability))
+            begin = end
+    # sumo reads the route file incrementally and needs it sorted by begin
+    flows.sort()
+    with open(routefile, "w") as routes:
+        print(HEADER % nsMaxSpeed, file=routes)
+        for flowNr, (begin, direction, end, probability) in enumerate(flows):
+            route, vtype, _, attributes = DIRECTIONS[direction]
+            print('    <flow id="%s_%i" type="%s" route="%s" begin="%i" end="%i" probability="%s"%s/>' % (
+                route, flowNr, vtype, route, begin, end, repr(float(probability)), attributes), file=routes)
+        print("</routes>", file=routes)
+
+
+def sumo_seed(seed):
+    """the seed of sumo's own random draws (e.g. the departures of flows)
+    for a scenario seed, taken from its routes stream"""
+    return int(random_streams(seed)["routes"].integers(2**31))
+
+
+def read_counts(path, chunk_size=100000):
+    """yield the columns time, approach and count of a csv file of
+    detector counts as arrays, chunk_size rows at a time"""
+    approaches = dict((approach, i) for i, (_, _, approach, _) in enumerate(DIRECTIONS))
+    with open(path) as f:
+        reader = csv.DictReader(f)
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                return
+            yield (np.array([float(row["time"]) for row in rows]),
+                   np.array([approaches[row["approach"].strip()] for row in rows]),
+                   np.array([float(row["count"]) for row in rows]))
+
+
+def calibrate(path, slice_length=900, period=86400, interval=60, chunk_size=100000):
+    """the departure probabilities per second of the four directions in
+    every time slice of a period, estimated from historical counts
+
+    path is a csv file with the columns time (seconds), approach (north,
+    east, south or west) and count, the number of vehicles counted on the
+    approach during interval seconds from time. The file is streamed in
+    chunks and may span many periods (e.g. days), the counts of all periods
+    are averaged per slice. Slices without counts get probability 0.
+    """
+    num_slices = int(np.ceil(period / slice_length))
+    shape = (num_slices, len(DIRECTIONS))
+    counts = np.zeros(shape)
+    observed = np.zeros(shape)
+    for times, approaches, values in read_counts(path, chunk_size):
+        cells = ((times % period) // slice_length).astype(int) * len(DIRECTIONS) + approaches
+        counts += np.bincount(cells, weights=values, minlength=counts.size).reshape(shape)
+        observed += interval * np.bincount(cells, minlength=counts.size).reshape(shape)
+    return np.minimum(np.where(observed > 0, counts / np.maximum(observed, 1), 0), 1)
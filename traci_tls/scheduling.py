@@ -0,0 +1,108 @@
+"""
+Event driven advancing of the simulation.
+
+Most simulation steps of a controller cannot change its decision: the
+yellow phases, the minimum green time, or a green phase in which the
+detectors did not change noticeably. The DecisionScheduler computes the
+next point in time where a decision can matter and advances sumo straight
+to it with a single simulationStep(t) call.
+"""
+from __future__ import absolute_import
+from __future__ import division
+
+from traci_tls.sumo import traci
+
+
+class DecisionScheduler(object):
+
+    def __init__(self, tls_id="0", detectors=(), threshold=None, stride=1, step_length=1):
+        """detectors and threshold configure wait_for_change
+
+        The jam lengths of the lane area detectors are subscribed to, so
+        they come back with every simulationStep without extra round trips.
+        """
+        self.tls_id = tls_id
+        self.detectors = list(detectors)
+        self.threshold = threshold
+        self.stride = stride
+        self.step_length = step_length
+        # the simulated time after the last step and the number of
+        # simulationStep calls (i.e. round trips) so far
+        self.time = 0
+        self.num_steps = 0
+        # the target of the next call to step
+        self.next_time = None
+        self.wait_until = None
+        if threshold is not None:
+            for detector in self.detectors:
+                traci.lanearea.subscribe(detector, [traci.constants.JAM_LENGTH_METERS])
+
+    def advance(self, t=None):
+        """advance to time t (by one step if t is None) and return the new time"""
+        if t is None or t <= self.time + self.step_length:
+            traci.simulationStep()
+            self.time += self.step_length
+        else:
+            traci.simulationStep(float(t))
+            self.time = t
+        self.num_steps += 1
+        return self.time
+
+    def step(self):
+        """advance to the next decision point set by one of the hold methods
+        (by one step if none was set) and return the new time"""
+        next_time, wait_until = self.next_time, self.wait_until
+        self.next_time = self.wait_until = None
+        if wait_until is not None:
+            return self.wait_for_change(wait_until)
+        return self.advance(next_time)
+
+    def hold_until(self, t):
+        """the next decision is due at time t"""
+        self.next_time = t
+
+    def hold_phase(self):
+        """the next decision is due in the first step of the next phase"""
+        self.next_time = self.phase_end()
+
+    def hold_until_change(self, until):
+        """the next decision is due when the detectors changed, see wait_for_change"""
+        self.wait_until = until
+
+    def phase_end(self):
+        """the first time step of the phase following the current one"""
+        # the program switches after the step at getNextSwitch
+        return int(traci.trafficlight.getNextSwitch(self.tls_id)) + self.step_length
+
+    def skip_phase(self):
+        """advance to the first step of the next phase"""
+        return self.advance(self.phase_end())
+
+    def until_phase(self, phase):
+        """advance until the traffic light is in the given phase
+
+        This costs two round trips per phase change instead of two per step.
+        """
+        while traci.trafficlight.getPhase(self.tls_id) != phase:
+            self.skip_phase()
+        return self.time
+
+    def jam_lengths(self):
+        results = [traci.lanearea.getSubscriptionResults(detector) for detector in self.detectors]
+        return [result[traci.constants.JAM_LENGTH_METERS] for result in results]
+
+    def wait_for_change(self, until):
+        """advance in strides until a detector's jam length changed by at
+        least the threshold or until the given time, whichever comes first
+
+        Without a threshold this is a single step, i.e. a decision every step.
+        """
+        if self.threshold is None:
+            return self.advance()
+        baseline = self.jam_lengths()
+        while self.time + self.stride < until:
+            self.advance(self.time + self.stride)
+            current = self.jam_lengths()
+            if max(abs(c - b) for c, b in zip(current, baseline)) >= self.threshold:
+                return self.time
+        return self.advance(until)
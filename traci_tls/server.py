@@ -0,0 +1,214 @@
+"""
+Answer the decisions of a trained occupancy controller over a socket.
+
+The Q table of a q_learning_2.QLearning checkpoint is loaded once. Clients
+connect over TCP (host:port) or a Unix socket (unix:/path) and send fixed
+size binary requests
+
+    REQUEST  <IBH4f  request id, light phase, elapsed time, occupancies of
+                     the detectors north, east, south and west
+    RESPONSE <IB     request id, action
+
+The action is the index of the green phase to show next in the phases of
+the agent (occupancy_agent.AGENT_PARAMETERS["phases"], i.e. 0: phase 0,
+1: phase 2), not keep/change: the light switches if that phase differs
+from the current one. A request with a light phase that is not one of the
+phases or with occupancies that are not finite is answered with REJECTED.
+
+A client may send several requests before reading the responses, they are
+matched by the request id. The requests of all connections are collected
+by a single thread and answered in batches with one vectorized lookup of
+the greedy actions.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import os
+import sys
+import time
+import queue
+import socket
+import struct
+import optparse
+import threading
+import socketserver
+
+import numpy as np
+
+from traci_tls.metrics import Metric
+from traci_tls.occupancy_agent import create_agent
+
+REQUEST = struct.Struct("<IBH4f")
+RESPONSE = struct.Struct("<IB")
+REJECTED = 255
+
+
+def parse_address(address):
+    """the socket family and address of host:port or unix:/path"""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, port = address.rsplit(":", 1)
+    return socket.AF_INET, (host, int(port))
+
+
+def connect(address):
+    family, address = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    if family == socket.AF_INET:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.connect(address)
+    return sock
+
+
+def recv_exactly(sock, size):
+    """read size bytes from sock, b"" if the connection was closed"""
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return b""
+        data += chunk
+    return data
+
+
+def greedy_actions(q, light_phase, occupancies, elapsed_time):
+    """the greedy actions of q for arrays of observations
+
+    The Q table only covers min_elapsed_time <= elapsed_time < max_elapsed_time,
+    the controller never decides outside of that range.
+    """
+    occupancies = np.asarray(occupancies)
+    ns_occupancy = np.maximum(occupancies[:, 0], occupancies[:, 2])
+    ew_occupancy = np.maximum(occupancies[:, 1], occupancies[:, 3])
+    elapsed_time = np.clip(elapsed_time, q.min_elapsed_time, q.max_elapsed_time - 1)
+    states = q.digitize_state(np.asarray(light_phase, dtype=int), ns_occupancy, ew_occupancy, elapsed_time)
+    return np.argmax(q.q_table[states], axis=1)
+
+
+class DecisionServer(object):
+    """serve the greedy actions of q at address until shutdown() is called"""
+
+    def __init__(self, q, address, max_batch=256):
+        self.q = q
+        self.max_batch = max_batch
+        self.requests = queue.Queue()
+        # seconds between receiving a request and sending its response
+        self.latency = Metric(quantiles=(0.5, 0.99))
+        self.num_batches = 0
+        self.num_rejected = 0
+
+        server = self
+        family, address = parse_address(address)
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                if family == socket.AF_INET:
+                    self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                lock = threading.Lock()
+                while True:
+                    data = recv_exactly(self.request, REQUEST.size)
+                    if not data:
+                        break
+                    server.requests.put((time.time(), REQUEST.unpack(data), self.request, lock))
+
+        if family == socket.AF_UNIX:
+            if os.path.exists(address):
+                os.remove(address)
+            base = socketserver.UnixStreamServer
+        else:
+            base = socketserver.TCPServer
+        server_class = type("Server", (socketserver.ThreadingMixIn, base),
+                            {"daemon_threads": True, "allow_reuse_address": True})
+        self.server = server_class(address, Handler)
+        self.batcher = threading.Thread(target=self.answer)
+        self.batcher.daemon = True
+
+    def serve_forever(self):
+        self.batcher.start()
+        self.server.serve_forever()
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def answer(self):
+        """answer the queued requests, all that arrived meanwhile at once"""
+        while True:
+            batch = [self.requests.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.requests.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                actions = self.decide([request for _, request, _, _ in batch])
+            except Exception as e:
+                # keep serving the other requests, only this batch is rejected
+                print("failed to answer a batch: %r" % e, file=sys.stderr)
+                actions = [REJECTED] * len(batch)
+            for (received, request, connection, lock), action in zip(batch, actions):
+                if action == REJECTED:
+                    self.num_rejected += 1
+                try:
+                    with lock:
+                        connection.sendall(RESPONSE.pack(request[0], action))
+                except socket.error:
+                    # the client is gone
+                    continue
+                self.latency.append(time.time() - received)
+            self.num_batches += 1
+
+    def decide(self, requests):
+        """the actions of a list of requests, REJECTED for invalid ones"""
+        light_phase = np.array([request[1] for request in requests])
+        elapsed_time = np.array([request[2] for request in requests])
+        occupancies = np.array([request[3:] for request in requests])
+        valid = np.isin(light_phase, self.q.phases) & np.all(np.isfinite(occupancies), axis=1)
+        actions = np.full(len(requests), REJECTED)
+        if valid.any():
+            actions[valid] = greedy_actions(self.q, light_phase[valid], occupancies[valid], elapsed_time[valid])
+        return actions
+
+    def report(self):
+        summary = self.latency.summary()
+        return "{} decisions ({} rejected) in {} batches, latency p50 {:.1f} us, p99 {:.1f} us".format(
+            summary["count"], self.num_rejected, self.num_batches, 1e6 * summary["p50"], 1e6 * summary["p99"])
+
+
+def get_options(args=None):
+    optParser = optparse.OptionParser(usage="%prog [options] Q_TABLE")
+    optParser.add_option("-a", "--address", default="127.0.0.1:8813",
+                         help="host:port or unix:/path to listen on [default: %default]")
+    optParser.add_option("--max-batch", dest="max_batch", type="int", default=256,
+                         help="the most requests answered at once [default: %default]")
+    optParser.add_option("--report-interval", dest="report_interval", type="float", default=10,
+                         help="seconds between two latency reports [default: %default]")
+    options, args = optParser.parse_args(args)
+    if len(args) != 1:
+        optParser.error("a single Q table (csv) is required")
+    options.q_table = args[0]
+    return options
+
+
+def main(args=None):
+    options = get_options(args)
+    q = create_agent("tabular", options.q_table)
+    server = DecisionServer(q, options.address, options.max_batch)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    print("serving {} on {}".format(options.q_table, options.address))
+    try:
+        while thread.is_alive():
+            thread.join(options.report_interval)
+            print(server.report())
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    server.shutdown()
+    print(server.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+"""
+Independent random number streams of a run.
+
+All randomness of a run (the routes, the agent's initialization and
+exploration, the Dyna planner) is drawn from numpy Generators spawned from
+a single seed with a SeedSequence, instead of the global random states.
+Runs with different seeds or keys get statistically independent streams,
+and a run is reproducible no matter which process or thread executes it.
+"""
+from __future__ import absolute_import
+
+import numpy as np
+
+STREAMS = ("routes", "agent", "planner")
+
+
+def random_streams(seed, *key):
+    """a dict of independent Generators by the names in STREAMS
+
+    key (non-negative ints, e.g. the index of an agent) separates several
+    runs that share one seed.
+    """
+    sequence = np.random.SeedSequence(seed, spawn_key=key)
+    return dict(zip(STREAMS, [np.random.default_rng(child) for child in sequence.spawn(len(STREAMS))]))
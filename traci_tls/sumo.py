@@ -0,0 +1,34 @@
+"""
+Bootstrap of the SUMO python tools and the way SUMO is started.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import os
+import sys
+
+# we need to import python modules from the $SUMO_HOME/tools directory
+try:
+    if "SUMO_HOME" in os.environ:
+        sys.path.append(os.path.join(os.environ["SUMO_HOME"], "tools"))
+    from sumolib import checkBinary  # noqa
+except ImportError:
+    sys.exit(
+        "please declare environment variable 'SUMO_HOME' as the root directory of your sumo installation (it should contain folders 'bin', 'tools' and 'docs')")
+
+import traci  # noqa
+
+
+def sumo_command(nogui, config="data/cross.sumocfg", *args):
+    """return the command line starting sumo (or sumo-gui) with the given config"""
+    if nogui:
+        sumoBinary = checkBinary('sumo')
+    else:
+        sumoBinary = checkBinary('sumo-gui')
+    return [sumoBinary, "-c", config] + list(args)
+
+
+def start(nogui, config="data/cross.sumocfg", *args):
+    # this is the normal way of using traci. sumo is started as a
+    # subprocess and then the python script connects and runs
+    traci.start(sumo_command(nogui, config, *args))
@@ -0,0 +1,146 @@
+"""
+Static description of the network and its detectors.
+
+Lanes, lane lengths, the lane area detectors with their lanes and
+approaches, and the link indices of the traffic lights never change during
+a run. They are read once from the net and additional files instead of
+being queried over TraCI, and cached in a pickle keyed by the hash of the
+input files.
+"""
+from __future__ import absolute_import
+
+import os
+import pickle
+import hashlib
+import tempfile
+from collections import namedtuple
+from xml.etree import ElementTree
+
+# the order of the approaches used by the controllers (detector 0 to 3)
+APPROACHES = ("north", "east", "south", "west")
+AXES = {"north": "ns", "south": "ns", "east": "ew", "west": "ew"}
+
+Lane = namedtuple("Lane", ["id", "edge", "length", "approach"])
+Detector = namedtuple("Detector", ["id", "lane", "pos", "length", "approach"])
+Link = namedtuple("Link", ["index", "from_lane", "to_lane", "via"])
+
+
+class Topology(object):
+
+    def __init__(self, lanes, detectors, tls_links):
+        # lane id -> Lane, detector id -> Detector, tls id -> [Link] by link index
+        self.lanes = lanes
+        self.detectors = detectors
+        self.tls_links = tls_links
+        self.lanes_by_approach = dict((approach, []) for approach in APPROACHES)
+        for lane in sorted(lanes.values()):
+            if lane.approach:
+                self.lanes_by_approach[lane.approach].append(lane.id)
+        self.detectors_by_approach = dict((approach, []) for approach in APPROACHES)
+        for detector in sorted(detectors.values()):
+            self.detectors_by_approach[detector.approach].append(detector.id)
+
+    def approach_detectors(self):
+        """the first detector of every approach in the order of APPROACHES"""
+        return [self.detectors_by_approach[approach][0] for approach in APPROACHES]
+
+    def detectors_on_axis(self, axis):
+        return [detector.id for detector in sorted(self.detectors.values()) if AXES[detector.approach] == axis]
+
+
+def approach_of(shape):
+    """the side of the junction a lane with the given shape comes from"""
+    points = [tuple(float(c) for c in point.split(",")) for point in shape.split()]
+    dx = points[-1][0] - points[0][0]
+    dy = points[-1][1] - points[0][1]
+    if abs(dx) > abs(dy):
+        return "west" if dx > 0 else "east"
+    return "south" if dy > 0 else "north"
+
+
+def parse(net_file, additional_files):
+    """build the Topology from the net file and the additional files with the detectors"""
+    lanes = {}
+    tls_links = {}
+    tls_lanes = set()
+    for _, elem in ElementTree.iterparse(net_file):
+        if elem.tag == "connection" and "tl" in elem.attrib:
+            from_lane = "%s_%s" % (elem.get("from"), elem.get("fromLane"))
+            link = Link(int(elem.get("linkIndex")), from_lane,
+                        "%s_%s" % (elem.get("to"), elem.get("toLane")), elem.get("via"))
+            tls_links.setdefault(elem.get("tl"), []).append(link)
+            tls_lanes.add(from_lane)
+    for links in tls_links.values():
+        links.sort()
+
+    shapes = {}
+    for _, elem in ElementTree.iterparse(net_file):
+        if elem.tag == "edge" and elem.get("function") != "internal":
+            for lane in elem.findall("lane"):
+                shapes[lane.get("id")] = lane.get("shape")
+                lanes[lane.get("id")] = Lane(lane.get("id"), elem.get("id"), float(lane.get("length")), None)
+            elem.clear()
+    # only the lanes controlled by a traffic light approach a junction
+    for lane_id in tls_lanes:
+        lanes[lane_id] = lanes[lane_id]._replace(approach=approach_of(shapes[lane_id]))
+
+    detectors = {}
+    for additional_file in additional_files:
+        for elem in ElementTree.parse(additional_file).iter():
+            if elem.tag in ("laneAreaDetector", "e2Detector"):
+                lane = lanes[elem.get("lane")]
+                pos = float(elem.get("pos"))
+                if "endPos" in elem.attrib:
+                    length = min(float(elem.get("endPos")), lane.length) - pos
+                else:
+                    length = float(elem.get("length"))
+                detectors[elem.get("id")] = Detector(elem.get("id"), lane.id, pos, length, lane.approach)
+    return Topology(lanes, detectors, tls_links)
+
+
+def files_of_config(config):
+    """the net file and the additional files of a sumo configuration"""
+    base = os.path.dirname(config)
+    root = ElementTree.parse(config).getroot()
+    net_file = root.find("input/net-file").get("value")
+    additional = root.find("input/additional-files")
+    additional_files = additional.get("value").split(",") if additional is not None else []
+    return os.path.join(base, net_file), [os.path.join(base, f) for f in additional_files]
+
+
+def load(config="data/cross.sumocfg", cache=True):
+    """return the Topology of the network of a sumo configuration
+
+    The result is pickled next to the net file. The pickle is rebuilt
+    whenever the hash of the net or additional files changes or it cannot
+    be read.
+    """
+    net_file, additional_files = files_of_config(config)
+    digest = hashlib.sha1()
+    for path in [net_file] + additional_files:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    key = digest.hexdigest()
+    cache_file = os.path.splitext(net_file)[0] + ".topology.pickle"
+    if cache and os.path.exists(cache_file):
+        try:
+            with open(cache_file, "rb") as f:
+                cached_key, topology = pickle.load(f)
+            if cached_key == key:
+                return topology
+        except (EOFError, pickle.UnpicklingError, ValueError, TypeError):
+            # a truncated or otherwise broken cache is rebuilt like an outdated one
+            pass
+    topology = parse(net_file, additional_files)
+    if cache:
+        # several processes (e.g. the workers of evaluate.py) may build the
+        # cache at once, each writes its own file and moves it into place
+        fd, tmp_file = tempfile.mkstemp(prefix=os.path.basename(cache_file) + ".", dir=os.path.dirname(cache_file))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((key, topology), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except BaseException:
+            os.remove(tmp_file)
+            raise
+    return topology
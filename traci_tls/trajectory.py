@@ -0,0 +1,116 @@
+"""
+Append-only columnar log of the observations of a control loop.
+
+Every column is a raw binary file of fixed size records next to a json file
+describing the columns, so a log can be appended to by several runs and is
+read back as numpy memory maps without parsing or copying.
+"""
+from __future__ import absolute_import
+
+import os
+import json
+
+import numpy as np
+
+META_FILE = "columns.json"
+
+
+class TrajectoryWriter(object):
+    """buffer rows and append them to the column files chunk by chunk
+
+    columns is a list of (name, dtype, shape) and attrs a dict of anything
+    json serializable needed to interpret the log (e.g. the agent's
+    parameters). Appending to an existing log requires the same columns
+    and attrs; columns left longer than the others by a killed run are cut to the
+    common length first, so the new rows stay aligned.
+    """
+
+    def __init__(self, directory, columns, attrs=None, chunk_size=4096):
+        self.directory = directory
+        self.columns = [(name, np.dtype(dtype), tuple(shape)) for name, dtype, shape in columns]
+        meta = {
+            "columns": [[name, dtype.str, list(shape)] for name, dtype, shape in self.columns],
+            "attrs": attrs or {},
+        }
+        meta_path = os.path.join(directory, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                existing = json.load(f)
+            if existing["columns"] != meta["columns"]:
+                raise ValueError("the columns of the trajectory log '%s' differ" % directory)
+            # compare as stored, i.e. after the json round trip
+            if existing["attrs"] != json.loads(json.dumps(meta["attrs"])):
+                raise ValueError("the attrs of the trajectory log '%s' differ" % directory)
+            length = num_rows(directory, self.columns)
+            for name, dtype, shape in self.columns:
+                path = os.path.join(directory, name + ".bin")
+                if os.path.exists(path):
+                    with open(path, "r+b") as f:
+                        f.truncate(length * row_size(dtype, shape))
+        else:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            with open(meta_path, "w") as f:
+                json.dump(meta, f, indent=1)
+        self.buffers = dict((name, np.zeros((chunk_size,) + shape, dtype))
+                            for name, dtype, shape in self.columns)
+        self.length = 0
+
+    def append(self, **values):
+        for name, _, _ in self.columns:
+            self.buffers[name][self.length] = values[name]
+        self.length += 1
+        if self.length == len(self.buffers[self.columns[0][0]]):
+            self.flush()
+
+    def flush(self):
+        for name, _, _ in self.columns:
+            with open(os.path.join(self.directory, name + ".bin"), "ab") as f:
+                f.write(self.buffers[name][:self.length].tobytes())
+        self.length = 0
+
+    def close(self):
+        self.flush()
+
+
+def row_size(dtype, shape):
+    return dtype.itemsize * int(np.prod(shape))
+
+
+def num_rows(directory, columns):
+    """the number of complete rows of all columns"""
+    length = None
+    for name, dtype, shape in columns:
+        path = os.path.join(directory, name + ".bin")
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        rows = size // row_size(dtype, shape)
+        length = rows if length is None else min(length, rows)
+    return length or 0
+
+
+def load_trajectory(directory):
+    """return the attrs and a dict of read-only memory maps of the columns of a log
+
+    A run that was killed while flushing may leave columns of different
+    lengths, all columns are cut to the shortest one.
+    """
+    with open(os.path.join(directory, META_FILE)) as f:
+        meta = json.load(f)
+    columns = [(name, np.dtype(dtype), tuple(shape)) for name, dtype, shape in meta["columns"]]
+    length = num_rows(directory, columns)
+    data = {}
+    for name, dtype, shape in columns:
+        if length:
+            data[name] = np.memmap(os.path.join(directory, name + ".bin"), dtype=dtype, mode="r",
+                                   shape=(length,) + shape)
+        else:
+            data[name] = np.zeros((0,) + shape, dtype)
+    return meta["attrs"], data
+
+
+def next_episode(directory, column="episode"):
+    """the number of the next run appended to the log in directory"""
+    if not os.path.exists(os.path.join(directory, META_FILE)):
+        return 0
+    _, data = load_trajectory(directory)
+    return int(data[column][-1]) + 1 if len(data[column]) else 0